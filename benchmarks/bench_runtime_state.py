@@ -0,0 +1,79 @@
+"""Benchmark runtime_state under many threads using distinct node ids.
+
+Each thread runs ``with_queue_state`` against its own node id. The operation
+can optionally hold the state for ``--hold-ms`` (a sleep, which releases the
+GIL like file or database I/O would) to show lock contention. Every run is
+repeated with all calls serialized behind one extra global lock, which models
+the single ``RLock`` store the shards replaced.
+
+    python benchmarks/bench_runtime_state.py --threads 1 4 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _load_runtime_state():
+    spec = importlib.util.spec_from_file_location("flow_assistor_runtime_state", _ROOT / "runtime_state.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(runtime_state, threads: int, calls: int, hold: float, global_lock: threading.Lock | None) -> float:
+    runtime_state.clear_runtime_state()
+    start = threading.Barrier(threads + 1)
+
+    def operation(state: dict) -> int:
+        state["index"] += 1
+        if hold:
+            time.sleep(hold)
+        return state["index"]
+
+    def worker(node_id: str) -> None:
+        start.wait()
+        for _ in range(calls):
+            if global_lock is None:
+                runtime_state.with_queue_state("bench", node_id, lambda: {"index": 0}, operation)
+            else:
+                with global_lock:
+                    runtime_state.with_queue_state("bench", node_id, lambda: {"index": 0}, operation)
+
+    workers = [threading.Thread(target=worker, args=(str(index),)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * calls / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--calls", type=int, default=2000, help="calls per thread")
+    parser.add_argument("--hold-ms", type=float, default=0.0, help="time each call holds its state")
+    args = parser.parse_args()
+    runtime_state = _load_runtime_state()
+    hold = args.hold_ms / 1000.0
+    calls = args.calls if not hold else max(1, min(args.calls, int(0.5 / hold)))
+
+    print(f"hold={args.hold_ms} ms, calls per thread={calls}")
+    print(f"{'threads':>8} {'sharded ops/s':>15} {'global lock ops/s':>18} {'ratio':>7}")
+    for threads in args.threads:
+        sharded = _run(runtime_state, threads, calls, hold, None)
+        serialized = _run(runtime_state, threads, calls, hold, threading.Lock())
+        print(f"{threads:>8} {sharded:>15,.0f} {serialized:>18,.0f} {sharded / serialized:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""Shared HTTP download subsystem for Flow Assistor nodes.
+
+LoRA Online and Caption Creator both fetch large files. Routing them through one
+manager gives every transfer the same pooled ``aiohttp`` session, per-host
+connection limits, a global bound on concurrent transfers and bandwidth, and
+resumable byte-range downloads. Concurrent requests for the same URL share one
+transfer instead of each opening their own connections.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from pathlib import Path
+from typing import Union
+
+import aiohttp
+
+
+_CHUNK_SIZE = 4 * 1024 * 1024
+_SEGMENTS = 4
+_MIN_SEGMENT_SIZE = 64 * 1024 * 1024
+_CHECKPOINT_BYTES = 64 * 1024 * 1024
+_SEGMENT_RETRIES = 3
+_CONNECTION_LIMIT = 16
+_CONNECTION_LIMIT_PER_HOST = 6
+_DEFAULT_MAX_TRANSFERS = 2
+_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=60, sock_read=120)
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+TargetResolver = Callable[[str, Mapping[str, str]], Path]
+Target = Union[Path, TargetResolver]
+
+
+class DownloadError(RuntimeError):
+    """Raised when a download cannot be completed or verified."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _format_mib(value: int) -> str:
+    return f"{value / (1024 * 1024):.0f} MiB"
+
+
+def _parse_total_size(content_range: str | None) -> int | None:
+    # Content-Range: bytes 0-0/123456
+    if not content_range or "/" not in content_range:
+        return None
+    try:
+        return int(content_range.rsplit("/", 1)[1].strip())
+    except ValueError:
+        return None
+
+
+def _plan_segments(size: int) -> list[list[int]]:
+    count = max(1, min(_SEGMENTS, -(-size // _MIN_SEGMENT_SIZE)))
+    step = -(-size // count)
+    return [[start, min(size, start + step) - 1, 0] for start in range(0, size, step)]
+
+
+def _load_resume_state(state_path: Path, partial: Path, url: str, size: int) -> list[list[int]] | None:
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if state.get("url") != url or state.get("size") != size:
+        return None
+    try:
+        if partial.stat().st_size != size:
+            return None
+    except OSError:
+        return None
+    segments = state.get("segments")
+    if not isinstance(segments, list) or not segments:
+        return None
+    try:
+        return [[int(start), int(end), int(done)] for start, end, done in segments]
+    except (TypeError, ValueError):
+        return None
+
+
+def _save_resume_state(state_path: Path, url: str, size: int, segments: list[list[int]]) -> None:
+    temporary = state_path.with_name(f"{state_path.name}.tmp")
+    temporary.write_text(
+        json.dumps({"url": url, "size": size, "segments": segments}),
+        encoding="utf-8",
+    )
+    os.replace(temporary, state_path)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        while True:
+            block = handle.read(_CHUNK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Throttle:
+    """Global byte-rate budget shared by every active transfer."""
+
+    def __init__(self, bytes_per_second: int) -> None:
+        self.rate = max(0, int(bytes_per_second))
+        self._next = 0.0
+
+    async def consume(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        start = max(self._next, now)
+        self._next = start + amount / self.rate
+        delay = start - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class _Progress:
+    def __init__(self, total: int, callback: ProgressCallback | None) -> None:
+        self.total = max(1, int(total))
+        self.done = 0
+        self._callback = callback
+
+    async def advance(self, amount: int) -> None:
+        self.done += amount
+        if self._callback is not None:
+            await self._callback(min(self.done, self.total), self.total)
+
+
+class DownloadManager:
+    """Pooled, deduplicating, budgeted downloader."""
+
+    def __init__(self, *, max_transfers: int, bandwidth: int) -> None:
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._slots = asyncio.Semaphore(max(1, int(max_transfers)))
+        self._throttle = _Throttle(bandwidth)
+        self._transfers: dict[str, asyncio.Task[Path]] = {}
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Return the long-lived session bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=_CONNECTION_LIMIT,
+                limit_per_host=_CONNECTION_LIMIT_PER_HOST,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=_TIMEOUT)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        session, self._session = self._session, None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def download(
+        self,
+        url: str,
+        target: Target,
+        *,
+        headers: Mapping[str, str] | None = None,
+        sha256: str | None = None,
+        force: bool = False,
+        progress: ProgressCallback | None = None,
+        label: str = "Flow Assistor",
+    ) -> Path:
+        """Download ``url`` and return the final path.
+
+        ``target`` is either a path or a callable that receives the redirected
+        URL and response headers and returns the path, which lets callers name
+        files from ``Content-Disposition``. An existing target is returned
+        without transferring the body unless ``force`` is set. Concurrent calls
+        for the same URL await one shared transfer.
+        """
+
+        existing = self._transfers.get(url)
+        if existing is None:
+            existing = asyncio.ensure_future(
+                self._transfer(
+                    url,
+                    target,
+                    headers=dict(headers or {}),
+                    sha256=sha256,
+                    force=force,
+                    progress=progress,
+                    label=label,
+                )
+            )
+            self._transfers[url] = existing
+            existing.add_done_callback(lambda task: self._forget(url, task))
+        else:
+            print(f"[{label}] Joining in-flight download of {url}", flush=True)
+        # Shield the shared task so one cancelled waiter does not abort the
+        # transfer for everyone else waiting on the same URL.
+        return await asyncio.shield(existing)
+
+    def _forget(self, url: str, task: asyncio.Task[Path]) -> None:
+        if self._transfers.get(url) is task:
+            self._transfers.pop(url, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away.
+            task.exception()
+
+    async def _probe(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict[str, str],
+    ) -> tuple[str, Mapping[str, str], int | None, bool]:
+        probe_headers = {**headers, "Range": "bytes=0-0"}
+        async with session.get(url, headers=probe_headers, allow_redirects=True) as response:
+            response.raise_for_status()
+            final_url = str(response.url or url)
+            response_headers = response.headers.copy()
+            if response.status == 206:
+                size = _parse_total_size(response.headers.get("Content-Range"))
+                return final_url, response_headers, size, True
+            length = response.headers.get("Content-Length")
+            try:
+                size = int(length) if length else None
+            except ValueError:
+                size = None
+            return final_url, response_headers, size, False
+
+    async def _transfer(
+        self,
+        url: str,
+        target: Target,
+        *,
+        headers: dict[str, str],
+        sha256: str | None,
+        force: bool,
+        progress: ProgressCallback | None,
+        label: str,
+    ) -> Path:
+        async with self._slots:
+            session = await self.session()
+            try:
+                final_url, response_headers, size, ranges = await self._probe(session, url, headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                raise DownloadError(f"Failed to reach {url}: {exc}") from exc
+
+            path = Path(target(final_url, response_headers)) if callable(target) else Path(target)
+            if not force and path.is_file() and path.stat().st_size > 0:
+                return path
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{path.name}.part")
+            state_path = path.with_name(f"{path.name}.part.json")
+            print(f"[{label}] Downloading {path.name} to {path.parent}", flush=True)
+            try:
+                if ranges and size:
+                    await self._download_ranged(
+                        session, url, final_url, headers, partial, state_path, size, progress, label
+                    )
+                    downloaded = partial.stat().st_size
+                else:
+                    state_path.unlink(missing_ok=True)
+                    downloaded = await self._download_stream(
+                        session, final_url, headers, partial, progress
+                    )
+
+                if downloaded == 0:
+                    raise DownloadError(f"Downloaded file is empty: {url}")
+                if size is not None and downloaded != size:
+                    partial.unlink(missing_ok=True)
+                    state_path.unlink(missing_ok=True)
+                    raise DownloadError(
+                        f"Incomplete download for {path.name}: received {downloaded} "
+                        f"of {size} bytes."
+                    )
+                if sha256:
+                    actual = await asyncio.to_thread(sha256_file, partial)
+                    if actual.lower() != sha256.lower():
+                        partial.unlink(missing_ok=True)
+                        state_path.unlink(missing_ok=True)
+                        raise DownloadError(
+                            f"Checksum mismatch for {path.name}: expected {sha256}, got {actual}."
+                        )
+
+                os.replace(partial, path)
+                state_path.unlink(missing_ok=True)
+                if progress is not None:
+                    await progress(1, 1)
+                print(f"[{label}] Download complete: {path}", flush=True)
+                return path
+            except BaseException as exc:
+                # Ranged downloads keep their .part and checkpoint so the next
+                # run can resume; a single-stream partial cannot be resumed.
+                if not state_path.exists():
+                    partial.unlink(missing_ok=True)
+                if isinstance(exc, (DownloadError, asyncio.CancelledError)):
+                    raise
+                if not isinstance(exc, Exception):
+                    raise
+                raise DownloadError(f"Failed to download {path.name}: {exc}") from exc
+
+    async def _download_ranged(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        final_url: str,
+        headers: dict[str, str],
+        partial: Path,
+        state_path: Path,
+        size: int,
+        progress_callback: ProgressCallback | None,
+        label: str,
+    ) -> None:
+        segments = _load_resume_state(state_path, partial, url, size)
+        if segments is None:
+            with partial.open("wb") as output:
+                output.truncate(size)
+            segments = _plan_segments(size)
+            _save_resume_state(state_path, url, size, segments)
+        else:
+            resumed = sum(segment[2] for segment in segments)
+            print(
+                f"[{label}] Resuming {partial.name} at {_format_mib(resumed)} "
+                f"of {_format_mib(size)}.",
+                flush=True,
+            )
+
+        progress = _Progress(size, progress_callback)
+        progress.done = sum(segment[2] for segment in segments)
+
+        def checkpoint() -> None:
+            _save_resume_state(state_path, url, size, segments)
+
+        tasks = [
+            asyncio.ensure_future(
+                self._download_segment(
+                    session, final_url, headers, partial, segment, progress, checkpoint, label
+                )
+            )
+            for segment in segments
+            if segment[2] < segment[1] - segment[0] + 1
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _download_segment(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict[str, str],
+        partial: Path,
+        segment: list[int],
+        progress: _Progress,
+        checkpoint: Callable[[], None],
+        label: str,
+    ) -> None:
+        """Fetch one byte range into its slot of the preallocated ``.part`` file."""
+        start, end, _done = segment
+        length = end - start + 1
+        attempts = 0
+        while segment[2] < length:
+            offset = start + segment[2]
+            unsynced = 0
+            try:
+                range_headers = {**headers, "Range": f"bytes={offset}-{end}"}
+                async with session.get(url, headers=range_headers) as response:
+                    response.raise_for_status()
+                    if response.status != 206:
+                        raise DownloadError("Server stopped honouring byte-range requests.")
+                    with partial.open("r+b") as output:
+                        output.seek(offset)
+                        async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                            if not chunk:
+                                continue
+                            chunk = chunk[: length - segment[2] - unsynced]
+                            await self._throttle.consume(len(chunk))
+                            output.write(chunk)
+                            unsynced += len(chunk)
+                            await progress.advance(len(chunk))
+                            if unsynced >= _CHECKPOINT_BYTES:
+                                output.flush()
+                                os.fsync(output.fileno())
+                                segment[2] += unsynced
+                                unsynced = 0
+                                checkpoint()
+                            if segment[2] + unsynced >= length:
+                                break
+                        output.flush()
+                        os.fsync(output.fileno())
+                        segment[2] += unsynced
+                        checkpoint()
+                if start + segment[2] == offset:
+                    raise DownloadError(f"Server returned no data for byte range {offset}-{end}.")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                attempts += 1
+                if attempts > _SEGMENT_RETRIES:
+                    raise
+                print(
+                    f"[{label}] Segment {start}-{end} interrupted ({exc}); "
+                    f"retrying from byte {start + segment[2]}.",
+                    flush=True,
+                )
+                # Bytes written after the last checkpoint are fetched again, so
+                # roll the progress bar back to the durable position.
+                progress.done -= unsynced
+                await asyncio.sleep(min(2**attempts, 10))
+
+    async def _download_stream(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: dict[str, str],
+        partial: Path,
+        progress_callback: ProgressCallback | None,
+    ) -> int:
+        """Single-connection fallback for servers without byte-range support."""
+        downloaded = 0
+        async with session.get(url, headers=headers, allow_redirects=True) as response:
+            response.raise_for_status()
+            length = response.headers.get("Content-Length")
+            try:
+                expected = int(length) if length else 0
+            except ValueError:
+                expected = 0
+            progress = _Progress(expected, progress_callback)
+            with partial.open("wb") as output:
+                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    await self._throttle.consume(len(chunk))
+                    output.write(chunk)
+                    downloaded += len(chunk)
+                    await progress.advance(len(chunk))
+                output.flush()
+                os.fsync(output.fileno())
+        return downloaded
+
+
+_MANAGER: DownloadManager | None = None
+
+
+def get_download_manager() -> DownloadManager:
+    """Return the process-wide manager.
+
+    ``FLOW_ASSISTOR_MAX_DOWNLOADS`` bounds concurrent transfers and
+    ``FLOW_ASSISTOR_DOWNLOAD_BANDWIDTH`` caps total throughput in bytes per
+    second (``0`` means unlimited).
+    """
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = DownloadManager(
+            max_transfers=_env_int("FLOW_ASSISTOR_MAX_DOWNLOADS", _DEFAULT_MAX_TRANSFERS),
+            bandwidth=_env_int("FLOW_ASSISTOR_DOWNLOAD_BANDWIDTH", 0),
+        )
+    return _MANAGER
+
+
+__all__ = [
+    "DownloadError",
+    "DownloadManager",
+    "get_download_manager",
+    "sha256_file",
+]
@@ -1,15 +1,33 @@
 """ComfyUI V3 extension entrypoint and node inventory."""
 
+import os
+
+import folder_paths
 from comfy_api.latest import ComfyExtension, io
 
 from .nodes import NODE_CLASSES
 from .routes import register_routes
-from .runtime_state import clear_runtime_state
+from .runtime_state import configure_runtime_state
+
+
+_STATE_FILENAME = "flow_assistor_state.sqlite3"
+
+
+def _configure_state() -> None:
+    backend = os.environ.get("FLOW_ASSISTOR_STATE_BACKEND", "memory")
+    path = os.environ.get("FLOW_ASSISTOR_STATE_PATH") or os.path.join(
+        folder_paths.get_user_directory(), _STATE_FILENAME
+    )
+    try:
+        configure_runtime_state(backend, path)
+    except Exception as exc:
+        print(f"[Flow Assistor] Runtime state backend {backend!r} unavailable, using memory: {exc}")
+        configure_runtime_state("memory")
 
 
 class FlowAssistorExtension(ComfyExtension):
     async def on_load(self) -> None:
-        clear_runtime_state()
+        _configure_state()
         register_routes()
 
     async def get_node_list(self) -> list[type[io.ComfyNode]]:
@@ -0,0 +1,188 @@
+"""Persistent content-addressed cache for Caption Creator results.
+
+Caption generation uses a fixed seed, so identical resized pixels, model
+precision, prompt, and sampling options always decode to the same caption. The
+cache stores those captions in a small SQLite database with an in-memory LRU in
+front of it, letting repeated queue runs skip the model entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import torch
+
+
+_MEMORY_ENTRIES = 1024
+_MAX_DISK_BYTES = 64 * 1024 * 1024
+# Eviction removes a little more than the overflow so consecutive inserts do not
+# each pay for a DELETE pass.
+_EVICTION_SLACK = 0.10
+
+
+def image_digest(image: Any) -> str:
+    """Hash one prepared caption image by shape, dtype, and pixel content."""
+    tensor = image.detach()
+    if tensor.dtype != torch.float32:
+        tensor = tensor.float()
+    array = tensor.to("cpu").contiguous().numpy()
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(tuple(array.shape)).encode("ascii"))
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def caption_key(image_hash: str, **identity: Any) -> str:
+    """Combine an image hash with everything else that determines a caption."""
+    payload = json.dumps(identity, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256()
+    digest.update(image_hash.encode("ascii"))
+    digest.update(b"\0")
+    digest.update(payload.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CaptionCache:
+    """Size-bounded caption store with an in-memory LRU front."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        memory_entries: int = _MEMORY_ENTRIES,
+        max_disk_bytes: int = _MAX_DISK_BYTES,
+    ) -> None:
+        self.path = Path(path)
+        self.memory_entries = max(0, int(memory_entries))
+        self.max_disk_bytes = max(1, int(max_disk_bytes))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._connection: sqlite3.Connection | None = None
+        self._disk_bytes: int | None = None
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._connection is not None:
+            return self._connection
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS captions ("
+                "key TEXT PRIMARY KEY, caption TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS captions_last_access ON captions(last_access)"
+            )
+            row = connection.execute("SELECT COALESCE(SUM(size), 0) FROM captions").fetchone()
+            connection.commit()
+        except sqlite3.Error as exc:
+            # The on-disk tier is an optimization; fall back to memory only.
+            print(f"[Caption Creator] Caption cache disabled on disk: {exc}", flush=True)
+            return None
+        self._disk_bytes = int(row[0])
+        self._connection = connection
+        return connection
+
+    def _remember(self, key: str, caption: str) -> None:
+        if self.memory_entries == 0:
+            return
+        self._memory[key] = caption
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            caption = self._memory.get(key)
+            if caption is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return caption
+
+            connection = self._connect()
+            if connection is not None:
+                try:
+                    row = connection.execute(
+                        "SELECT caption FROM captions WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    if row is not None:
+                        connection.execute(
+                            "UPDATE captions SET last_access = ? WHERE key = ?",
+                            (time.time(), key),
+                        )
+                        connection.commit()
+                except sqlite3.Error as exc:
+                    print(f"[Caption Creator] Caption cache read failed: {exc}", flush=True)
+                    row = None
+                if row is not None:
+                    caption = str(row[0])
+                    self._remember(key, caption)
+                    self.hits += 1
+                    return caption
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, caption: str) -> None:
+        with self._lock:
+            self._remember(key, caption)
+            connection = self._connect()
+            if connection is None:
+                return
+            size = len(caption.encode("utf-8")) + len(key)
+            try:
+                previous = connection.execute(
+                    "SELECT size FROM captions WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO captions(key, caption, size, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, caption, size, time.time()),
+                )
+                self._disk_bytes = (self._disk_bytes or 0) + size - (int(previous[0]) if previous else 0)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_locked(connection)
+                connection.commit()
+            except sqlite3.Error as exc:
+                print(f"[Caption Creator] Caption cache write failed: {exc}", flush=True)
+
+    def _evict_locked(self, connection: sqlite3.Connection) -> None:
+        target = int(self.max_disk_bytes * (1.0 - _EVICTION_SLACK))
+        removed = 0
+        overflow = (self._disk_bytes or 0) - target
+        rows = connection.execute(
+            "SELECT key, size FROM captions ORDER BY last_access ASC"
+        )
+        stale: list[tuple[str]] = []
+        for key, size in rows:
+            if removed >= overflow:
+                break
+            stale.append((key,))
+            removed += int(size)
+        connection.executemany("DELETE FROM captions WHERE key = ?", stale)
+        for (key,) in stale:
+            self._memory.pop(key, None)
+        self._disk_bytes = (self._disk_bytes or 0) - removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+__all__ = ["CaptionCache", "caption_key", "image_digest"]
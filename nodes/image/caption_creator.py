@@ -5,12 +5,10 @@ from __future__ import annotations
 import asyncio
 from dataclasses import dataclass
 import gc
-import os
 import time
 from pathlib import Path
 from typing import Any
 
-import aiohttp
 import torch
 import torch.nn.functional as F
 
@@ -20,6 +18,9 @@ import folder_paths
 from comfy_api.latest import ComfyAPI, io
 
 from ..categories import IMAGE_CAPTION
+from .caption_cache import CaptionCache, caption_key, image_digest
+
+from ...download_manager import DownloadError, get_download_manager
 
 
 _MODEL_SPECS = {
@@ -29,6 +30,8 @@ _MODEL_SPECS = {
             "https://huggingface.co/Merserk/qwen3vl-4b-int8-convrot/resolve/main/"
             "qwen3vl_4b_int8_convrot.safetensors"
         ),
+        # Optional hex digest checked after download; None verifies size only.
+        "sha256": None,
     },
     "int4": {
         "filename": "qwen3vl_4b_int4_convrot.safetensors",
@@ -36,10 +39,11 @@ _MODEL_SPECS = {
             "https://huggingface.co/Merserk/qwen3vl-4b-int4-convrot/resolve/main/"
             "qwen3vl_4b_int4_convrot.safetensors"
         ),
+        "sha256": None,
     },
 }
 _MODEL_SUBFOLDER = "flow-assistor"
-_DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+_CAPTION_CACHE_FILENAME = "caption_cache.sqlite3"
 _DOWNLOAD_HEADERS = {"User-Agent": "ComfyUI-Flow-Assistor/2.4.1 Caption-Creator"}
 
 # This is only an emergency guard against a model that never emits its stop
@@ -48,6 +52,10 @@ _GENERATION_TOKEN_CEILING = 512
 _CAPTION_MAX_EDGE = 784
 _VISION_ALIGNMENT = 28  # Qwen patch_size (14) * merge_size (2).
 
+# Images tokenized per model-residency check. Generation is still one image at
+# a time; the cap only bounds how many tokenized vision prompts are held at once.
+_GROUP_SIZE = 64
+
 # Qwen3-VL Instruct-style sampling. These conservative defaults avoid the
 # broad token distribution that caused numeric and short-token loops in v2.4.
 # The fixed seed keeps identical inputs reproducible.
@@ -66,6 +74,7 @@ _API = ComfyAPI()
 _MODEL_LOCK = asyncio.Lock()
 _CACHED_MODEL_PATH: Path | None = None
 _CACHED_CLIP: Any = None
+_CAPTION_CACHE: CaptionCache | None = None
 
 
 class CaptionCreatorError(RuntimeError):
@@ -112,6 +121,27 @@ def _model_path(model_precision: str) -> Path:
     return _model_directory() / filename
 
 
+def _caption_cache() -> CaptionCache:
+    global _CAPTION_CACHE
+    path = _model_directory() / _CAPTION_CACHE_FILENAME
+    if _CAPTION_CACHE is None or _CAPTION_CACHE.path != path:
+        if _CAPTION_CACHE is not None:
+            _CAPTION_CACHE.close()
+        _CAPTION_CACHE = CaptionCache(path)
+    return _CAPTION_CACHE
+
+
+def _caption_identity(model_precision: str, words: int, prompt: str) -> dict[str, Any]:
+    """Everything besides the pixels that changes the decoded caption."""
+    return {
+        "model": _model_path(model_precision).name,
+        "words": int(words),
+        "prompt": prompt,
+        "options": _GENERATION_OPTIONS,
+        "max_length": _GENERATION_TOKEN_CEILING,
+    }
+
+
 async def _set_progress(value: int, max_value: int) -> None:
     try:
         await _API.execution.set_progress(
@@ -124,58 +154,19 @@ async def _set_progress(value: int, max_value: int) -> None:
         pass
 
 
-async def _download_file(url: str, target: Path) -> None:
-    target.parent.mkdir(parents=True, exist_ok=True)
-    partial = target.with_name(f"{target.name}.part")
-    partial.unlink(missing_ok=True)
-
-    timeout = aiohttp.ClientTimeout(total=None, connect=60, sock_read=120)
-    downloaded = 0
-    expected_size: int | None = None
-
+async def _download_file(url: str, target: Path, sha256: str | None = None) -> None:
     try:
-        print(f"[Caption Creator] Downloading {target.name} to {target.parent}", flush=True)
-        async with aiohttp.ClientSession(headers=_DOWNLOAD_HEADERS, timeout=timeout) as session:
-            async with session.get(url, allow_redirects=True) as response:
-                response.raise_for_status()
-                expected_size_header = response.headers.get("Content-Length")
-                if expected_size_header:
-                    try:
-                        expected_size = int(expected_size_header)
-                    except ValueError:
-                        expected_size = None
-
-                progress_max = expected_size if expected_size and expected_size > 0 else 1
-                with partial.open("wb") as output:
-                    async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
-                        if not chunk:
-                            continue
-                        output.write(chunk)
-                        downloaded += len(chunk)
-                        await _set_progress(min(downloaded, progress_max), progress_max)
-
-                    output.flush()
-                    os.fsync(output.fileno())
-
-        if downloaded == 0:
-            raise CaptionCreatorError(f"Downloaded file is empty: {url}")
-        if expected_size is not None and downloaded != expected_size:
-            raise CaptionCreatorError(
-                f"Incomplete download for {target.name}: received {downloaded} "
-                f"of {expected_size} bytes."
-            )
-
-        os.replace(partial, target)
-        final_progress = expected_size if expected_size and expected_size > 0 else 1
-        await _set_progress(final_progress, final_progress)
-        print(f"[Caption Creator] Download complete: {target}", flush=True)
-    except BaseException as exc:
-        partial.unlink(missing_ok=True)
-        if isinstance(exc, (CaptionCreatorError, asyncio.CancelledError)):
-            raise
-        if not isinstance(exc, Exception):
-            raise
-        raise CaptionCreatorError(f"Failed to download {target.name}: {exc}") from exc
+        await get_download_manager().download(
+            url,
+            target,
+            headers=_DOWNLOAD_HEADERS,
+            sha256=sha256,
+            force=True,
+            progress=_set_progress,
+            label="Caption Creator",
+        )
+    except DownloadError as exc:
+        raise CaptionCreatorError(str(exc)) from exc
 
 
 async def _ensure_model(model_precision: str, auto_download: bool) -> Path:
@@ -191,7 +182,7 @@ async def _ensure_model(model_precision: str, auto_download: bool) -> Path:
         )
 
     spec = _MODEL_SPECS[model_precision]
-    await _download_file(spec["url"], target)
+    await _download_file(spec["url"], target, spec.get("sha256"))
     if not target.is_file() or target.stat().st_size == 0:
         raise CaptionCreatorError(f"Model download did not produce a valid file: {target}")
     return target
@@ -485,7 +476,7 @@ def _estimated_inference_memory(clip: Any, tokens: Any) -> int:
         return 0
 
 
-def _prefer_accelerator_residency(clip: Any, tokens: Any) -> _ResidencyInfo:
+def _prefer_accelerator_residency(clip: Any, memory_required: int) -> _ResidencyInfo:
     patcher = getattr(clip, "patcher", None)
     if patcher is None:
         return _ResidencyInfo(
@@ -512,7 +503,6 @@ def _prefer_accelerator_residency(clip: Any, tokens: Any) -> _ResidencyInfo:
 
     full_load_error: str | None = None
     if _device_type(execution_device) != "cpu":
-        memory_required = _estimated_inference_memory(clip, tokens)
         try:
             model_management.load_models_gpu(
                 [patcher],
@@ -612,71 +602,97 @@ def _generated_token_count(generated_ids: Any) -> int:
         return 0
 
 
-def _generate_one(
+def _tokenize_caption(clip: Any, prompt: str, image: Any) -> Any:
+    try:
+        return clip.tokenize(
+            prompt,
+            image=image,
+            skip_template=False,
+            min_length=1,
+            thinking=False,
+        )
+    except TypeError as exc:
+        raise CaptionCreatorError(
+            "Caption Creator requires a current ComfyUI tokenizer that supports "
+            "thinking=False for Qwen3-VL. Update ComfyUI."
+        ) from exc
+    except Exception as exc:
+        raise CaptionCreatorError(f"Caption tokenization failed: {exc}") from exc
+
+
+def _generate_group(
     clip: Any,
-    image: Any,
-    words: int,
+    images: Any,
+    prompt: str,
     model_precision: str,
     *,
     log_device: bool,
-) -> str:
-    prompt = _build_prompt(words)
+) -> list[str]:
+    """Caption a group of images, one generation pass per image, behind one residency check."""
+
+    count = int(images.shape[0])
+    captions: list[str] = []
 
     try:
         with torch.inference_mode():
-            try:
-                tokens = clip.tokenize(
-                    prompt,
-                    image=image,
-                    skip_template=False,
-                    min_length=1,
-                    thinking=False,
-                )
-            except TypeError as exc:
-                raise CaptionCreatorError(
-                    "Caption Creator requires a current ComfyUI tokenizer that supports "
-                    "thinking=False for Qwen3-VL. Update ComfyUI."
-                ) from exc
-
-            residency = _prefer_accelerator_residency(clip, tokens)
+            tokens = [
+                _tokenize_caption(clip, prompt, images[index : index + 1])
+                for index in range(count)
+            ]
+
+            # Rows are generated one after another, so the largest single row
+            # is the most memory inference needs at any time.
+            memory_required = max(_estimated_inference_memory(clip, item) for item in tokens)
+            residency = _prefer_accelerator_residency(clip, memory_required)
             if log_device:
                 _log_residency(residency, model_precision)
 
             started = time.perf_counter()
-            try:
-                generated_ids = clip.generate(
-                    tokens,
-                    max_length=_GENERATION_TOKEN_CEILING,
-                    **_GENERATION_OPTIONS,
+            for item in tokens:
+                row_started = time.perf_counter()
+                try:
+                    generated_ids = clip.generate(
+                        item,
+                        max_length=_GENERATION_TOKEN_CEILING,
+                        **_GENERATION_OPTIONS,
+                    )
+                except TypeError as exc:
+                    raise CaptionCreatorError(
+                        "Caption Creator requires a current ComfyUI generation API with "
+                        "sampling, repetition_penalty, presence_penalty, and min_p support. "
+                        "Update ComfyUI."
+                    ) from exc
+                duration = time.perf_counter() - row_started
+                decoded_text = clip.decode(generated_ids)
+
+                if not isinstance(decoded_text, str):
+                    raise CaptionCreatorError(
+                        "The model decoder returned a non-text value instead of a caption."
+                    )
+                if decoded_text == "":
+                    raise CaptionCreatorError("The model stopped before generating caption text.")
+
+                token_count = _generated_token_count(generated_ids)
+                hit_ceiling = token_count >= _GENERATION_TOKEN_CEILING
+                print(
+                    "[Caption Creator] "
+                    f"generation_tokens={token_count}, duration={duration:.2f}s, "
+                    f"hit_ceiling={str(hit_ceiling).lower()}",
+                    flush=True,
                 )
-            except TypeError as exc:
-                raise CaptionCreatorError(
-                    "Caption Creator requires a current ComfyUI generation API with sampling, "
-                    "repetition_penalty, presence_penalty, and min_p support. Update ComfyUI."
-                ) from exc
-            duration = time.perf_counter() - started
-            decoded_text = clip.decode(generated_ids)
+                captions.append(decoded_text)
+            group_duration = time.perf_counter() - started
     except CaptionCreatorError:
         raise
     except Exception as exc:
         raise CaptionCreatorError(f"Caption generation failed: {exc}") from exc
 
-    if not isinstance(decoded_text, str):
-        raise CaptionCreatorError(
-            "The model decoder returned a non-text value instead of a caption."
+    if count > 1:
+        print(
+            f"[Caption Creator] group={count}, duration={group_duration:.2f}s",
+            flush=True,
         )
-    if decoded_text == "":
-        raise CaptionCreatorError("The model stopped before generating caption text.")
-
-    token_count = _generated_token_count(generated_ids)
-    hit_ceiling = token_count >= _GENERATION_TOKEN_CEILING
-    print(
-        "[Caption Creator] "
-        f"generation_tokens={token_count}, duration={duration:.2f}s, "
-        f"hit_ceiling={str(hit_ceiling).lower()}",
-        flush=True,
-    )
-    return decoded_text
+    return captions
 
 
 class CaptionCreator(io.ComfyNode):
@@ -719,6 +735,15 @@ class CaptionCreator(io.ComfyNode):
                         "unrestricted detailed caption."
                     ),
                 ),
+                io.Boolean.Input(
+                    "use_cache",
+                    default=True,
+                    optional=True,
+                    tooltip=(
+                        "Reuse stored captions for identical images, precision, and word "
+                        "budget. Disable to always run the model."
+                    ),
+                ),
             ],
             outputs=[io.String.Output(display_name="text")],
         )
@@ -730,30 +755,60 @@ class CaptionCreator(io.ComfyNode):
         model_precision: str = "int8",
         auto_download: bool = True,
         words: int = 100,
+        use_cache: bool = True,
     ) -> io.NodeOutput:
         del cls
+        model_precision = str(model_precision)
         words = _normalize_words(words)
         image_batch = _validate_image_batch(image)
         caption_batch, original_size, caption_size = _prepare_caption_image(image_batch)
-        clip = await _load_clip(str(model_precision), bool(auto_download))
+        prompt = _build_prompt(words)
+        total = int(caption_batch.shape[0])
+
+        captions: list[str | None] = [None] * total
+        keys: list[str] = []
+        cache = _caption_cache() if use_cache else None
+        if cache is not None:
+            identity = _caption_identity(model_precision, words, prompt)
+            keys = [
+                caption_key(image_digest(caption_batch[index]), **identity)
+                for index in range(total)
+            ]
+            captions = [cache.get(key) for key in keys]
+        pending = [index for index, caption in enumerate(captions) if caption is None]
 
         print(
             f"[Caption Creator] image={original_size[0]}x{original_size[1]}, "
-            f"caption_input={caption_size[0]}x{caption_size[1]}, "
-            f"batch={int(caption_batch.shape[0])}",
+            f"caption_input={caption_size[0]}x{caption_size[1]}, batch={total}",
             flush=True,
         )
-
-        captions = [
-            _generate_one(
-                clip,
-                caption_batch[index : index + 1],
-                words,
-                str(model_precision),
-                log_device=index == 0,
+        if cache is not None:
+            print(
+                f"[Caption Creator] cache hits={total - len(pending)}, misses={len(pending)}, "
+                f"total_hits={cache.hits}, total_misses={cache.misses}",
+                flush=True,
             )
-            for index in range(int(caption_batch.shape[0]))
-        ]
+
+        if pending:
+            clip = await _load_clip(model_precision, bool(auto_download))
+            pending_batch = caption_batch[pending] if len(pending) < total else caption_batch
+
+            generated: list[str] = []
+            for start in range(0, len(pending), _GROUP_SIZE):
+                generated.extend(
+                    _generate_group(
+                        clip,
+                        pending_batch[start : start + _GROUP_SIZE],
+                        prompt,
+                        model_precision,
+                        log_device=start == 0,
+                    )
+                )
+            for index, caption in zip(pending, generated):
+                captions[index] = caption
+                if cache is not None:
+                    cache.put(keys[index], caption)
+
         text = "\n".join(captions)
         return io.NodeOutput(text, ui={"captions": captions})
 
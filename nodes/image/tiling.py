@@ -1,5 +1,8 @@
 """Tiling helpers migrated to the ComfyUI V3 node API."""
 
+import functools
+import math
+
 import torch
 import torch.nn.functional as F
 
@@ -10,8 +13,86 @@ from ..categories import IMAGE
 from ...v3_types import TileData
 
 
+def _as_mask_batch(mask, batch: int, height: int, width: int, device) -> torch.Tensor:
+    if mask.dim() == 2:
+        mask = mask.unsqueeze(0)
+    elif mask.dim() == 4:
+        mask = mask[..., 0]
+    mask = mask.to(device=device, dtype=torch.float32)
+    if int(mask.shape[1]) != height or int(mask.shape[2]) != width:
+        mask = F.interpolate(mask.unsqueeze(1), size=(height, width), mode="bilinear", align_corners=False)
+        mask = mask.squeeze(1)
+    if int(mask.shape[0]) != batch:
+        mask = mask[:1].expand(batch, -1, -1) if int(mask.shape[0]) == 1 else mask[:batch]
+    return mask
+
+
+def mask_bbox(mask: torch.Tensor, padding: int) -> tuple[int, int, int, int]:
+    """Return the padded ``(x, y, w, h)`` box around every masked pixel in the batch.
+
+    An empty mask selects the whole image.
+    """
+    height, width = int(mask.shape[-2]), int(mask.shape[-1])
+    active = mask.reshape(-1, height, width) > 0.0
+    rows = torch.nonzero(active.any(dim=0).any(dim=1)).flatten()
+    cols = torch.nonzero(active.any(dim=0).any(dim=0)).flatten()
+    if rows.numel() == 0 or cols.numel() == 0:
+        return 0, 0, width, height
+    padding = max(0, int(padding))
+    x0 = max(0, int(cols[0]) - padding)
+    y0 = max(0, int(rows[0]) - padding)
+    x1 = min(width, int(cols[-1]) + 1 + padding)
+    y1 = min(height, int(rows[-1]) + 1 + padding)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _axis_positions(start: int, length: int, tile: int, overlap: int) -> list[int]:
+    if length <= tile:
+        return [start]
+    step = max(1, tile - overlap)
+    count = math.ceil((length - tile) / step) + 1
+    span = length - tile
+    # Spread the remainder evenly so every tile overlaps its neighbours by at
+    # least ``overlap`` pixels and the last tile ends exactly on the region edge.
+    return [start + (span * index) // (count - 1) for index in range(count)]
+
+
+def tile_grid(
+    bbox: tuple[int, int, int, int],
+    target_size: int,
+    overlap: int,
+) -> list[tuple[int, int, int, int]]:
+    """Split a region into equally sized, overlapping ``(x, y, w, h)`` tiles."""
+    x, y, width, height = bbox
+    tile_width = max(1, min(int(target_size), width))
+    tile_height = max(1, min(int(target_size), height))
+    overlap = max(0, int(overlap))
+    xs = _axis_positions(x, width, tile_width, min(overlap, tile_width - 1))
+    ys = _axis_positions(y, height, tile_height, min(overlap, tile_height - 1))
+    return [(tile_x, tile_y, tile_width, tile_height) for tile_y in ys for tile_x in xs]
+
+
+def gather_tiles(source: torch.Tensor, tiles: list[tuple[int, int, int, int]]) -> torch.Tensor:
+    """Extract equally sized tiles as one tile-major batch.
+
+    A single tile is returned as a view. Several tiles are copied from strided
+    views straight into one preallocated batch, so no per-tile intermediate is
+    created. Rows ``t * B:(t + 1) * B`` hold tile ``t`` for every frame.
+    """
+    if len(tiles) == 1:
+        x, y, width, height = tiles[0]
+        return source[:, y : y + height, x : x + width]
+
+    batch = int(source.shape[0])
+    width, height = tiles[0][2], tiles[0][3]
+    output = source.new_empty((len(tiles) * batch, height, width, *source.shape[3:]))
+    for index, (x, y, _width, _height) in enumerate(tiles):
+        output[index * batch : (index + 1) * batch].copy_(source[:, y : y + height, x : x + width])
+    return output
+
+
 class TileManager(io.ComfyNode):
-    """Placeholder tile source that preserves the current workflow contract."""
+    """Crop the masked region of an image into a batch of overlapping tiles."""
 
     @classmethod
     def define_schema(cls) -> io.Schema:
@@ -19,12 +100,32 @@ class TileManager(io.ComfyNode):
             node_id="TileManager",
             display_name="Tile Manager (Crop)",
             category=IMAGE,
-            description="Passes an image and mask through with an empty TILE_DATA payload.",
+            description="Crops the padded mask region into overlapping tiles and returns them as one batch with TILE_DATA.",
             inputs=[
                 io.Image.Input("image"),
                 io.Mask.Input("mask"),
-                io.Int.Input("padding", default=64),
-                io.Int.Input("target_size", default=1024),
+                io.Int.Input(
+                    "padding",
+                    default=64,
+                    min=0,
+                    max=4096,
+                    tooltip="Pixels added around the masked area. An empty mask selects the whole image.",
+                ),
+                io.Int.Input(
+                    "target_size",
+                    default=1024,
+                    min=64,
+                    max=8192,
+                    tooltip="Maximum tile width and height. Larger regions are split into a tile grid.",
+                ),
+                io.Int.Input(
+                    "overlap",
+                    default=64,
+                    min=0,
+                    max=1024,
+                    optional=True,
+                    tooltip="Minimum overlap between neighbouring tiles.",
+                ),
             ],
             outputs=[
                 io.Image.Output(display_name="image"),
@@ -34,13 +135,335 @@ class TileManager(io.ComfyNode):
         )
 
     @classmethod
-    def execute(cls, image, mask, padding, target_size) -> io.NodeOutput:
-        del padding, target_size
-        return io.NodeOutput(image, mask, {})
+    def execute(cls, image, mask, padding, target_size, overlap=64) -> io.NodeOutput:
+        batch, image_height, image_width = (int(value) for value in image.shape[:3])
+        mask = _as_mask_batch(mask, batch, image_height, image_width, image.device)
+        bbox = mask_bbox(mask, padding)
+        tiles = tile_grid(bbox, target_size, overlap)
+
+        tile_images = gather_tiles(image, tiles)
+        tile_masks = gather_tiles(mask, tiles)
+        tile_width, tile_height = tiles[0][2], tiles[0][3]
+        tile_data = {
+            "tiles": [{"original_bbox": tile} for tile in tiles],
+            "region_bbox": bbox,
+            "target_size": (tile_width, tile_height),
+            "original_image_shape": (image_height, image_width),
+            "batch_size": batch,
+        }
+        if len(tiles) == 1:
+            tile_data["original_bbox"] = tiles[0]
+        print(
+            f"[TileManager] Region {bbox[2]}x{bbox[3]} at ({bbox[0]}, {bbox[1]}) "
+            f"-> {len(tiles)} tile(s) of {tile_width}x{tile_height}"
+        )
+        return io.NodeOutput(tile_images, tile_masks, tile_data)
+
+
+_MIN_BLEND_WEIGHT = 1e-3
+_RAMP_CACHE_ENTRIES = 256
+_STREAM_BAND_ROWS = 512
+
+
+def _tile_entries(tile_data: dict) -> list[dict]:
+    if not isinstance(tile_data, dict):
+        return []
+    entries = tile_data.get("tiles")
+    if not entries and "original_bbox" in tile_data:
+        entries = [{"original_bbox": tile_data["original_bbox"]}]
+    return [entry for entry in entries or () if isinstance(entry, dict) and "original_bbox" in entry]
+
+
+def _tile_boxes(tile_data: dict) -> list[tuple[int, int, int, int]]:
+    return [tuple(int(value) for value in entry["original_bbox"]) for entry in _tile_entries(tile_data)]
+
+
+def _tile_contents(tile_data: dict) -> list[tuple[float, float, float, float] | None]:
+    """Return each tile's ``content_bbox`` as fractions of the tile; ``None`` means the whole tile."""
+    contents = []
+    for entry in _tile_entries(tile_data):
+        content = entry.get("content_bbox")
+        contents.append(None if content is None else tuple(float(value) for value in content))
+    return contents
+
+
+def _tile_frames(tile_data: dict) -> list[int | None]:
+    """Return each tile's ``batch_index``; ``None`` means every frame."""
+    frames = []
+    for entry in _tile_entries(tile_data):
+        index = entry.get("batch_index")
+        frames.append(None if index is None else int(index))
+    return frames
+
+
+def _axis_ramp(length: int, radius: int, fade_start: bool, fade_end: bool, device, dtype) -> torch.Tensor:
+    # Fraction of a (2r + 1) box centred on each pixel that lies inside the
+    # tile; this is exactly what avg_pool2d over a zero-padded mask produces.
+    positions = torch.arange(length, device=device, dtype=torch.float32)
+    upper = positions + radius
+    lower = positions - radius
+    if fade_end:
+        upper = upper.clamp_max(length - 1)
+    if fade_start:
+        lower = lower.clamp_min(0)
+    return ((upper - lower + 1.0) / float(2 * radius + 1)).to(dtype=dtype)
+
+
+@functools.lru_cache(maxsize=_RAMP_CACHE_ENTRIES)
+def _cached_axis_ramps(
+    width: int,
+    height: int,
+    feather: int,
+    sides: tuple[bool, bool, bool, bool],
+    device: torch.device,
+    dtype: torch.dtype,
+) -> tuple[torch.Tensor, torch.Tensor]:
+    left, top, right, bottom = sides
+    return (
+        _axis_ramp(width, feather, left, right, device, dtype),
+        _axis_ramp(height, feather, top, bottom, device, dtype),
+    )
+
+
+def _feather_ramp(
+    width: int,
+    height: int,
+    feather: int,
+    sides: tuple[bool, bool, bool, bool],
+    device,
+    dtype: torch.dtype = torch.float32,
+) -> torch.Tensor:
+    """Return a ``(1, height, width, 1)`` feather mask for one tile.
+
+    ``sides`` selects the left, top, right, and bottom edges to fade. The mask
+    is the outer product of two analytic distance-to-edge ramps, which are
+    cached per tile size so repeated tiles skip the work.
+    """
+    radius = int(feather)
+    if radius <= 0 or not any(sides):
+        return torch.ones((1, height, width, 1), dtype=dtype, device=device)
+    columns, rows = _cached_axis_ramps(
+        int(width), int(height), radius, tuple(bool(side) for side in sides), torch.device(device), dtype
+    )
+    return (rows[:, None] * columns[None, :])[None, :, :, None]
+
+
+def _content_region(tile: torch.Tensor, content: tuple[float, float, float, float] | None) -> torch.Tensor:
+    # Letterboxed tiles carry their content box as fractions, so it still
+    # applies after a processing step changes the tile's resolution.
+    if content is None:
+        return tile
+    height, width = int(tile.shape[1]), int(tile.shape[2])
+    x = min(width - 1, int(round(content[0] * width)))
+    y = min(height - 1, int(round(content[1] * height)))
+    w = max(1, min(width - x, int(round(content[2] * width))))
+    h = max(1, min(height - y, int(round(content[3] * height))))
+    return tile[:, y : y + h, x : x + w, :]
+
+
+def _fit_tile(tile: torch.Tensor, width: int, height: int) -> torch.Tensor:
+    if int(tile.shape[2]) == width and int(tile.shape[1]) == height:
+        return tile
+    samples = tile.movedim(-1, 1)
+    upscaled = comfy.utils.common_upscale(samples, width, height, "lanczos", "disabled")
+    return upscaled.movedim(1, -1)
+
+
+class TileAccumulator:
+    """Weighted accumulation buffers covering the union of a set of tiles.
+
+    Tiles may be added one at a time and from any device; each contribution
+    is weighted on the tile's device and then added to buffers on
+    ``device``. Overlaps are averaged with normalized feather weights, and
+    only the outline of the union fades into the base image.
+    """
+
+    def __init__(
+        self,
+        base_shape: tuple[int, ...],
+        boxes: list[tuple[int, int, int, int]],
+        feather: int,
+        *,
+        frames: list[int | None] | None = None,
+        contents: list[tuple[float, float, float, float] | None] | None = None,
+        device=None,
+    ) -> None:
+        batch, image_height, image_width, channels = (int(value) for value in base_shape)
+        self.batch = batch
+        self.frames = list(frames) if frames else [None] * len(boxes)
+        self.contents = list(contents) if contents else [None] * len(boxes)
+        # Frame-specific tiles need their own weights per frame.
+        weight_batch = batch if any(frame is not None for frame in self.frames) else 1
+        self.image_size = (image_width, image_height)
+        self.feather = int(feather)
+        self.boxes = []
+        for x, y, w, h in boxes:
+            x = max(0, min(x, image_width - 1))
+            y = max(0, min(y, image_height - 1))
+            self.boxes.append((x, y, max(1, min(w, image_width - x)), max(1, min(h, image_height - y))))
+        # Processed tiles are resized to the requested box before clamping.
+        self.requested = [(w, h) for _x, _y, w, h in boxes]
+
+        self.x0 = min(x for x, _y, _w, _h in self.boxes)
+        self.y0 = min(y for _x, y, _w, _h in self.boxes)
+        self.x1 = max(x + w for x, _y, w, _h in self.boxes)
+        self.y1 = max(y + h for _x, y, _w, h in self.boxes)
+        region_height, region_width = self.y1 - self.y0, self.x1 - self.x0
+        self.device = torch.device("cpu") if device is None else torch.device(device)
+        self.accumulated = torch.zeros(
+            (batch, region_height, region_width, channels),
+            dtype=torch.float32,
+            device=self.device,
+        )
+        self.weight_sum = torch.zeros(
+            (weight_batch, region_height, region_width, 1),
+            dtype=torch.float32,
+            device=self.device,
+        )
+        self.coverage = torch.zeros_like(self.weight_sum)
+
+    def add(self, index: int, tile: torch.Tensor) -> None:
+        """Blend processed rows for tile ``index`` into the buffers."""
+        x, y, w, h = self.boxes[index]
+        frame = self.frames[index]
+        frames = slice(None) if frame is None else slice(frame, frame + 1)
+        image_width, image_height = self.image_size
+        # Weighting happens where the buffers live, so each tile crosses
+        # devices once instead of going out and back for an elementwise op.
+        tile = _content_region(tile.to(self.device), self.contents[index])
+        tile = _fit_tile(tile, *self.requested[index])[:, :h, :w, :]
+        canvas_edges = (x == 0, y == 0, x + w == image_width, y + h == image_height)
+        region_edges = (x == self.x0, y == self.y0, x + w == self.x1, y + h == self.y1)
+        weight = _feather_ramp(
+            w, h, self.feather, tuple(not edge for edge in canvas_edges), tile.device
+        ).clamp_min(_MIN_BLEND_WEIGHT)
+        outline = _feather_ramp(
+            w,
+            h,
+            self.feather,
+            tuple(region and not canvas for region, canvas in zip(region_edges, canvas_edges)),
+            tile.device,
+        )
+        rows = slice(y - self.y0, y - self.y0 + h)
+        cols = slice(x - self.x0, x - self.x0 + w)
+        self.accumulated[frames, rows, cols, :] += tile.to(torch.float32) * weight
+        self.weight_sum[frames, rows, cols, :] += weight
+        covered = self.coverage[frames, rows, cols, :]
+        covered.copy_(torch.maximum(covered, outline))
+
+    def composite(self, base_image: torch.Tensor, band_rows: int | None = None) -> torch.Tensor:
+        """Return a copy of ``base_image`` with the accumulated tiles blended in.
+
+        ``band_rows`` limits the float32 temporaries to that many rows at a
+        time, which keeps host memory flat for very large canvases.
+        """
+        output_image = base_image.clone()
+        height = self.y1 - self.y0
+        step = height if not band_rows else max(1, int(band_rows))
+        for start in range(0, height, step):
+            stop = min(height, start + step)
+            background = output_image[:, self.y0 + start : self.y0 + stop, self.x0 : self.x1, :]
+            weights = self.weight_sum[:, start:stop].clamp_min(_MIN_BLEND_WEIGHT)
+            blended = self.accumulated[:, start:stop] / weights
+            coverage = self.coverage[:, start:stop]
+            if background.device != self.device:
+                blended = blended.to(background.device)
+                coverage = coverage.to(background.device)
+            merged = torch.lerp(background.to(torch.float32), blended, coverage)
+            background.copy_(merged.to(dtype=base_image.dtype))
+        return output_image
+
+
+def _rows_per_tile(rows: int, tile_count: int, batch: int) -> int:
+    per_tile = rows // tile_count if rows % tile_count == 0 else 0
+    return per_tile if per_tile in {1, batch} else 0
+
+
+def _can_pin() -> bool:
+    return torch.cuda.is_available()
+
+
+def iter_tile_chunks(
+    image: torch.Tensor,
+    boxes: list[tuple[int, int, int, int]],
+    chunk_size: int = 1,
+    device=None,
+    frames: list[int | None] | None = None,
+):
+    """Yield ``(start, count, tiles)`` with at most ``chunk_size`` tiles per step.
+
+    Tiles are cut from ``image`` on the host, staged in pinned memory when an
+    accelerator is present, and copied to ``device`` without blocking, so
+    only one chunk ever lives on the accelerator. Tiles with a frame index in
+    ``frames`` are cut from that frame only. A chunk ends early where the tile
+    size changes, so every chunk is a single batch.
+    """
+    chunk_size = max(1, int(chunk_size))
+    frames = list(frames) if frames else [None] * len(boxes)
+    target = torch.device("cpu") if device is None else torch.device(device)
+    pin = target.type == "cuda" and image.device.type == "cpu" and _can_pin()
+    start = 0
+    while start < len(boxes):
+        size = boxes[start][2:]
+        stop = start + 1
+        while stop < min(len(boxes), start + chunk_size) and boxes[stop][2:] == size:
+            stop += 1
+        chunk = boxes[start:stop]
+        chunk_frames = frames[start:stop]
+        if all(frame is None for frame in chunk_frames):
+            tiles = gather_tiles(image, chunk)
+        else:
+            tiles = torch.cat(
+                [
+                    gather_tiles(image if frame is None else image[frame : frame + 1], [box])
+                    for box, frame in zip(chunk, chunk_frames)
+                ]
+            )
+        if pin:
+            tiles = tiles.pin_memory()
+        yield start, len(chunk), tiles.to(target, non_blocking=pin)
+        start = stop
+
+
+def stream_tiles(
+    image: torch.Tensor,
+    tile_data: dict,
+    process,
+    *,
+    feather: int = 16,
+    chunk_size: int = 1,
+    device=None,
+    band_rows: int = 512,
+) -> torch.Tensor:
+    """Run ``process`` over tiles in chunks and composite the results on the host.
+
+    The canvas and accumulation buffers stay in CPU memory; tile chunks are
+    pinned when an accelerator is used so uploads overlap with compute. Peak
+    accelerator memory is therefore bounded by ``chunk_size`` tiles rather than
+    the canvas size. ``process`` receives a tile-major batch on ``device`` and
+    must return the same number of rows.
+    """
+    boxes = _tile_boxes(tile_data)
+    frames = _tile_frames(tile_data)
+    if not boxes:
+        raise ValueError("tile_data does not contain any tiles.")
+    canvas = image.detach().to("cpu")
+    target = torch.device("cpu") if device is None else torch.device(device)
+    accumulator = TileAccumulator(tuple(canvas.shape), boxes, feather, frames=frames, device="cpu")
+    for start, count, tiles in iter_tile_chunks(canvas, boxes, chunk_size, target, frames):
+        processed = process(tiles)
+        rows = int(processed.shape[0])
+        per_tile = rows // count if rows == int(tiles.shape[0]) else 0
+        if not per_tile:
+            raise ValueError(f"process returned {int(processed.shape[0])} rows for {int(tiles.shape[0])} tiles.")
+        for offset in range(count):
+            accumulator.add(start + offset, processed[offset * per_tile : (offset + 1) * per_tile])
+        del tiles, processed
+    return accumulator.composite(canvas, band_rows=band_rows)
 
 
 class TileCompositor(io.ComfyNode):
-    """Paste a processed tile back into its source image."""
+    """Blend processed tiles back into their source image."""
 
     @classmethod
     def define_schema(cls) -> io.Schema:
@@ -48,62 +471,81 @@ class TileCompositor(io.ComfyNode):
             node_id="TileCompositor",
             display_name="Tile Compositor (Merge)",
             category=IMAGE,
-            description="Merges a processed tile into the original image using TILE_DATA.",
+            description="Merges one or more processed tiles into the original image using TILE_DATA.",
             inputs=[
                 io.Image.Input("base_image", tooltip="The original image."),
-                io.Image.Input("processed_tile", tooltip="The result from the sampler."),
+                io.Image.Input(
+                    "processed_tile",
+                    tooltip="The result from the sampler. Tile Manager batches hold every frame of tile 0, then tile 1, and so on.",
+                ),
                 TileData.Input("tile_data"),
                 io.Int.Input("feather", default=16, min=0, max=100, optional=True),
+                io.Int.Input(
+                    "chunk_size",
+                    default=0,
+                    min=0,
+                    max=256,
+                    optional=True,
+                    tooltip="0 blends every tile at once on the image's device. Higher values blend that many tiles at a time into a canvas kept in CPU memory.",
+                ),
             ],
             outputs=[io.Image.Output(display_name="composite_image")],
         )
 
     @classmethod
-    def execute(cls, base_image, processed_tile, tile_data, feather=16) -> io.NodeOutput:
-        if not tile_data or "original_bbox" not in tile_data:
+    def execute(cls, base_image, processed_tile, tile_data, feather=16, chunk_size=0) -> io.NodeOutput:
+        boxes = _tile_boxes(tile_data)
+        frames = _tile_frames(tile_data)
+        contents = _tile_contents(tile_data)
+        batch = int(base_image.shape[0])
+        if not boxes or any(frame is not None and not 0 <= frame < batch for frame in frames):
             print("[TileCompositor] Invalid tile_data. Returning base image.")
             return io.NodeOutput(base_image)
 
-        x, y, w, h = (int(value) for value in tile_data["original_bbox"])
-        base_device = base_image.device
-        base_dtype = base_image.dtype
-        processed_tile = processed_tile.to(device=base_device, dtype=base_dtype)
-
-        if int(processed_tile.shape[2]) != w or int(processed_tile.shape[1]) != h:
-            samples = processed_tile.movedim(-1, 1)
-            upscaled = comfy.utils.common_upscale(samples, w, h, "lanczos", "disabled")
-            restored_tile = upscaled.movedim(1, -1)
-        else:
-            restored_tile = processed_tile
-
-        output_image = base_image.clone()
-        batch, image_height, image_width, _ = output_image.shape
+        rows = int(processed_tile.shape[0])
+        per_tile = _rows_per_tile(rows, len(boxes), batch)
+        if any(frame is not None for frame in frames) and per_tile != 1:
+            per_tile = 0
+        if not per_tile:
+            print(
+                f"[TileCompositor] {rows} processed images do not match {len(boxes)} tile(s) "
+                f"for a batch of {batch}. Returning base image."
+            )
+            return io.NodeOutput(base_image)
 
-        x = max(0, min(x, image_width - 1))
-        y = max(0, min(y, image_height - 1))
-        w = max(1, min(w, image_width - x))
-        h = max(1, min(h, image_height - y))
-        restored_tile = restored_tile[:, :h, :w, :]
+        if int(chunk_size) > 0:
+            accumulator = TileAccumulator(
+                tuple(base_image.shape), boxes, feather, frames=frames, contents=contents, device="cpu"
+            )
+            step = int(chunk_size)
+            for start in range(0, len(boxes), step):
+                chunk = processed_tile[start * per_tile : (start + step) * per_tile].to("cpu")
+                for offset in range(min(step, len(boxes) - start)):
+                    accumulator.add(start + offset, chunk[offset * per_tile : (offset + 1) * per_tile])
+                del chunk
+            return io.NodeOutput(accumulator.composite(base_image.to("cpu"), band_rows=_STREAM_BAND_ROWS))
 
-        composite_mask = torch.zeros(
-            (batch, image_height, image_width),
-            dtype=torch.float32,
-            device=base_device,
+        processed_tile = processed_tile.to(device=base_image.device)
+        accumulator = TileAccumulator(
+            tuple(base_image.shape),
+            boxes,
+            feather,
+            frames=frames,
+            contents=contents,
+            device=base_image.device,
         )
-        composite_mask[:, y : y + h, x : x + w] = 1.0
-
-        if feather > 0:
-            mask_4d = composite_mask.unsqueeze(1)
-            radius = int(feather)
-            kernel = radius * 2 + 1
-            mask_4d = F.avg_pool2d(mask_4d, kernel_size=kernel, stride=1, padding=radius)
-            composite_mask = mask_4d.squeeze(1)
-
-        background_crop = output_image[:, y : y + h, x : x + w, :]
-        mask_crop = composite_mask[:, y : y + h, x : x + w].unsqueeze(-1).to(dtype=base_dtype)
-        merged_crop = restored_tile * mask_crop + background_crop * (1.0 - mask_crop)
-        output_image[:, y : y + h, x : x + w, :] = merged_crop
-        return io.NodeOutput(output_image)
+        for index in range(len(boxes)):
+            accumulator.add(index, processed_tile[index * per_tile : (index + 1) * per_tile])
+        return io.NodeOutput(accumulator.composite(base_image))
 
 
-__all__ = ["TileManager", "TileCompositor"]
+__all__ = [
+    "TileManager",
+    "TileCompositor",
+    "TileAccumulator",
+    "gather_tiles",
+    "iter_tile_chunks",
+    "mask_bbox",
+    "stream_tiles",
+    "tile_grid",
+]
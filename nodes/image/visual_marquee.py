@@ -3,16 +3,21 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
+import math
 import os
-import re
 import threading
 import time
 import uuid
+from collections import OrderedDict, deque
 from dataclasses import dataclass
+from io import BytesIO
 from typing import Any
 
 import numpy as np
 import torch
+import torch.nn.functional as F
 from PIL import Image
 from aiohttp import web
 
@@ -27,6 +32,19 @@ from ...v3_types import TileData
 
 WAIT_TIMEOUT_SECONDS = 600
 _STATE_LOCK = threading.RLock()
+_PREVIEW_FORMATS = {"jpeg": ("JPEG", "jpg"), "webp": ("WEBP", "webp"), "png": ("PNG", "png")}
+_PREVIEW_CACHE_ENTRIES = 16
+_PREVIEW_LOCK = threading.Lock()
+# Encoded previews by content key; evicted files are removed from the temp dir.
+_PREVIEW_FILES: OrderedDict[str, str] = OrderedDict()
+
+
+_THUMBNAIL_MIN_SIZE = 32
+# Totals across every node; queued selections also expire so a stale queue
+# cannot leak into a much later run.
+_MAX_QUEUED_SELECTIONS = 4096
+_QUEUED_TTL_SECONDS = 60 * 60
+_MAX_FRAME_CROPS = 4096
 
 
 @dataclass
@@ -35,23 +53,196 @@ class _PendingSelection:
     loop: asyncio.AbstractEventLoop
     future: asyncio.Future[dict[str, Any]]
     created: float
+    # Frames are encoded on request by ``marquee_frame_handler``.
+    frames: Any = None
+    preview_max_size: int = 1536
+    preview_quality: int = 85
 
 
 _STATE: dict[str, _PendingSelection] = {}
+# Selections submitted ahead of execution as ``(queued_at, payload)``,
+# consumed in order per ``(node_id, queue_key)``.
+_QUEUED: dict[tuple[str, str], deque[tuple[float, dict[str, Any]]]] = {}
+
+
+def _validate_rect(crop: Any, name: str) -> None:
+    if not isinstance(crop, dict):
+        raise ValueError(f"{name} must be an object")
+    for field in ("x", "y", "w", "h"):
+        value = crop.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(f"{name}.{field} must be a finite number")
+
+
+def _selection_payload(crop_data: Any, frame_crops: Any = None) -> dict[str, Any]:
+    """Validate a crop selection and return it as a submit payload."""
+    _validate_rect(crop_data, "crop_data")
+    payload: dict[str, Any] = {"__action__": "submit", "crop_data": crop_data}
+    if frame_crops is not None:
+        if not isinstance(frame_crops, list) or len(frame_crops) > _MAX_FRAME_CROPS:
+            raise ValueError(f"frame_crops must be a list of at most {_MAX_FRAME_CROPS} objects")
+        for index, item in enumerate(frame_crops):
+            _validate_rect(item, f"frame_crops[{index}]")
+        payload["frame_crops"] = frame_crops
+    return payload
+
+
+def _parse_crop_json(text: str) -> dict[str, Any] | None:
+    """Parse the ``crop_json`` input: one rectangle, a list of per-frame rectangles, or a payload."""
+    if not str(text).strip():
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise ValueError(f"[VisualMarquee] crop_json is not valid JSON: {exc}") from exc
+    try:
+        if isinstance(data, list):
+            return _selection_payload(data[0] if data else None, data)
+        if isinstance(data, dict) and ("crop_data" in data or "frame_crops" in data):
+            frame_crops = data.get("frame_crops")
+            crop_data = data.get("crop_data")
+            if crop_data is None and isinstance(frame_crops, list) and frame_crops:
+                crop_data = frame_crops[0]
+            return _selection_payload(crop_data, frame_crops)
+        return _selection_payload(data)
+    except ValueError as exc:
+        raise ValueError(f"[VisualMarquee] crop_json: {exc}") from exc
+
+
+def _expire_queued_locked(now: float) -> int:
+    """Drop expired selections and return how many remain in total."""
+    remaining = 0
+    for key in list(_QUEUED):
+        queue = _QUEUED[key]
+        while queue and now - queue[0][0] > _QUEUED_TTL_SECONDS:
+            queue.popleft()
+        if queue:
+            remaining += len(queue)
+        else:
+            del _QUEUED[key]
+    return remaining
+
+
+def _enqueue_selection(node_id: str, queue_key: str, payload: dict[str, Any]) -> int | None:
+    """Queue ``payload``; returns the queue length, or ``None`` when every queue is full."""
+    now = time.monotonic()
+    with _STATE_LOCK:
+        if _expire_queued_locked(now) >= _MAX_QUEUED_SELECTIONS:
+            return None
+        queue = _QUEUED.setdefault((node_id, queue_key), deque())
+        queue.append((now, payload))
+        return len(queue)
+
+
+def _take_queued(node_id: str, queue_key: str) -> dict[str, Any] | None:
+    # Without a key the node never reads queued selections, so clients that
+    # do not know the workflow's key cannot inject crops into it.
+    if not queue_key:
+        return None
+    with _STATE_LOCK:
+        _expire_queued_locked(time.monotonic())
+        queue = _QUEUED.get((node_id, queue_key))
+        if not queue:
+            return None
+        _queued_at, payload = queue.popleft()
+        if not queue:
+            _QUEUED.pop((node_id, queue_key), None)
+        return payload
 
 
-def _safe_filename_component(value: str) -> str:
-    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("._")
-    return safe[:96] or uuid.uuid4().hex
+def _clear_queued(node_id: str, queue_key: str) -> int:
+    with _STATE_LOCK:
+        return len(_QUEUED.pop((node_id, queue_key), ()))
+
+
+def _preview_pixels(frame: torch.Tensor, max_edge: int) -> np.ndarray:
+    """Downsample one frame to the editor's display size as ``uint8`` RGB."""
+    height, width = int(frame.shape[0]), int(frame.shape[1])
+    pixels = frame[..., :3].detach()
+    scale = min(1.0, float(max_edge) / float(max(height, width)))
+    if scale < 1.0:
+        size = (max(1, int(round(height * scale))), max(1, int(round(width * scale))))
+        samples = pixels.movedim(-1, 0).unsqueeze(0).to(torch.float32)
+        pixels = F.interpolate(samples, size=size, mode="bilinear", antialias=True, align_corners=False)
+        pixels = pixels[0].movedim(0, -1)
+    pixels = pixels.to(torch.float32).clamp(0.0, 1.0).mul(255.0).round().to(torch.uint8)
+    return pixels.cpu().numpy()
+
+
+def _preview_file(pixels: np.ndarray, preview_format: str, quality: int, output_dir: str) -> str:
+    """Encode a preview once per distinct content and return its temp filename."""
+    pil_format, extension = _PREVIEW_FORMATS.get(preview_format, _PREVIEW_FORMATS["jpeg"])
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((pixels.shape, pil_format, int(quality))).encode("ascii"))
+    digest.update(np.ascontiguousarray(pixels).tobytes())
+    key = digest.hexdigest()
+    filename = f"marquee_preview_{key}.{extension}"
+    full_path = os.path.join(output_dir, filename)
+
+    with _PREVIEW_LOCK:
+        if key in _PREVIEW_FILES and os.path.exists(full_path):
+            _PREVIEW_FILES.move_to_end(key)
+            return filename
+
+    image = Image.fromarray(pixels)
+    options: dict[str, Any] = {"quality": int(quality)} if pil_format != "PNG" else {"compress_level": 1}
+    partial_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        image.save(partial_path, format=pil_format, **options)
+    except (KeyError, OSError) as exc:
+        if pil_format == "JPEG":
+            raise
+        # Pillow builds without WebP support fall back to JPEG.
+        print(f"[VisualMarquee] {pil_format} preview unavailable ({exc}); using JPEG.")
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        return _preview_file(pixels, "jpeg", quality, output_dir)
+    os.replace(partial_path, full_path)
+
+    stale: list[str] = []
+    with _PREVIEW_LOCK:
+        _PREVIEW_FILES[key] = filename
+        _PREVIEW_FILES.move_to_end(key)
+        while len(_PREVIEW_FILES) > _PREVIEW_CACHE_ENTRIES:
+            stale.append(_PREVIEW_FILES.popitem(last=False)[1])
+    for name in stale:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except OSError:
+            pass
+    return filename
+
 
+def _encode_jpeg(pixels: np.ndarray, quality: int) -> bytes:
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=int(quality))
+    return buffer.getvalue()
 
-def _begin_wait(node_id: str) -> tuple[str, asyncio.Future[dict[str, Any]]]:
+
+def _begin_wait(
+    node_id: str,
+    frames: Any = None,
+    preview_max_size: int = 1536,
+    preview_quality: int = 85,
+) -> tuple[str, asyncio.Future[dict[str, Any]]]:
     loop = asyncio.get_running_loop()
     token = uuid.uuid4().hex
     future: asyncio.Future[dict[str, Any]] = loop.create_future()
     with _STATE_LOCK:
         previous = _STATE.pop(node_id, None)
-        _STATE[node_id] = _PendingSelection(token, loop, future, time.monotonic())
+        _STATE[node_id] = _PendingSelection(
+            token,
+            loop,
+            future,
+            time.monotonic(),
+            frames,
+            int(preview_max_size),
+            int(preview_quality),
+        )
     if previous is not None and not previous.future.done():
         previous.loop.call_soon_threadsafe(
             previous.future.set_exception,
@@ -94,23 +285,36 @@ async def submit_crop_handler(request: web.Request) -> web.Response:
         node_id = normalize_node_id(raw_node_id) if raw_node_id is not None and str(raw_node_id).strip() else ""
         token = str(data.get("token", "")).strip()
         action = str(data.get("action", "submit")).strip().lower()
+        queue_key = str(data.get("queue_key", "")).strip()
         crop_data = data.get("crop_data")
+        frame_crops = data.get("frame_crops")
 
         if not node_id:
             return web.json_response({"status": "error", "message": "Missing node_id"}, status=400)
+        if action not in {"submit", "cancel", "enqueue", "clear_queue"}:
+            return web.json_response({"status": "error", "message": "Invalid action"}, status=400)
+        if action in {"enqueue", "clear_queue"} and not queue_key:
+            return web.json_response({"status": "error", "message": "Missing queue_key"}, status=400)
+        if action == "clear_queue":
+            cleared = _clear_queued(node_id, queue_key)
+            return web.json_response({"status": "success", "action": action, "cleared": cleared})
+        if action in {"submit", "enqueue"}:
+            try:
+                payload = _selection_payload(crop_data, frame_crops)
+            except ValueError as exc:
+                return web.json_response({"status": "error", "message": str(exc)}, status=400)
+        else:
+            payload = {"__action__": action}
+        if action == "enqueue":
+            # Headless clients queue selections before the prompt runs; the
+            # node consumes them in order without opening the editor.
+            queued = _enqueue_selection(node_id, queue_key, payload)
+            if queued is None:
+                return web.json_response({"status": "error", "message": "Selection queue is full"}, status=429)
+            return web.json_response({"status": "success", "action": action, "queued": queued})
         if not token:
             return web.json_response({"status": "error", "message": "Missing token"}, status=400)
-        if action not in {"submit", "cancel"}:
-            return web.json_response({"status": "error", "message": "Invalid action"}, status=400)
-        if action == "submit" and not isinstance(crop_data, dict):
-            return web.json_response(
-                {"status": "error", "message": "crop_data must be an object"},
-                status=400,
-            )
 
-        payload = {"__action__": action}
-        if action == "submit":
-            payload["crop_data"] = crop_data
         ok, message = _set_payload(node_id, token, payload)
         if not ok:
             return web.json_response({"status": "error", "message": message}, status=409)
@@ -120,6 +324,226 @@ async def submit_crop_handler(request: web.Request) -> web.Response:
         return web.json_response({"status": "error", "message": str(exc)}, status=500)
 
 
+async def marquee_frame_handler(request: web.Request) -> web.Response:
+    """Serve one frame of the pending selection as a JPEG, encoded on demand."""
+    try:
+        query = request.rel_url.query
+        node_id = normalize_node_id(query.get("node_id"))
+        token = str(query.get("token", "")).strip()
+        try:
+            index = int(query.get("index", "0"))
+            size = int(query["size"]) if "size" in query else None
+        except ValueError:
+            return web.json_response({"status": "error", "message": "index and size must be integers"}, status=400)
+
+        with _STATE_LOCK:
+            pending = _STATE.get(node_id)
+            if pending is None or not token or token != pending.token:
+                return web.json_response({"status": "error", "message": "No matching selection"}, status=404)
+            frames = pending.frames
+            max_edge = pending.preview_max_size if size is None else size
+            quality = pending.preview_quality
+        if frames is None or not 0 <= index < int(frames.shape[0]):
+            return web.json_response({"status": "error", "message": "Frame out of range"}, status=404)
+
+        max_edge = max(_THUMBNAIL_MIN_SIZE, min(int(max_edge), max(int(frames.shape[1]), int(frames.shape[2]))))
+        pixels = await asyncio.to_thread(_preview_pixels, frames[index], max_edge)
+        body = await asyncio.to_thread(_encode_jpeg, pixels, quality)
+        return web.Response(
+            body=body,
+            content_type="image/jpeg",
+            headers={"Cache-Control": "private, max-age=600"},
+        )
+    except Exception as exc:
+        print(f"[VisualMarquee] API error: {exc}")
+        return web.json_response({"status": "error", "message": str(exc)}, status=500)
+
+
+def _clamp_rect(crop: dict, image_width: int, image_height: int) -> tuple[int, int, int, int]:
+    x = int(round(float(crop.get("x", 0))))
+    y = int(round(float(crop.get("y", 0))))
+    width = int(round(float(crop.get("w", 512))))
+    height = int(round(float(crop.get("h", 512))))
+    x = max(0, min(x, image_width - 1))
+    y = max(0, min(y, image_height - 1))
+    return x, y, max(1, min(width, image_width - x)), max(1, min(height, image_height - y))
+
+
+def _output_size(
+    width: int,
+    height: int,
+    original_size: bool,
+    max_resolution: int,
+    force_multiple_of_8: bool,
+) -> tuple[int, int]:
+    if original_size:
+        return width, height
+    scale = float(max_resolution) / float(max(width, height))
+    output_width = max(1, int(round(width * scale)))
+    output_height = max(1, int(round(height * scale)))
+    if force_multiple_of_8:
+        output_width = max(8, (output_width // 8) * 8)
+        output_height = max(8, (output_height // 8) * 8)
+    return output_width, output_height
+
+
+def _resize(samples: torch.Tensor, width: int, height: int) -> torch.Tensor:
+    if int(samples.shape[2]) == width and int(samples.shape[1]) == height:
+        return samples
+    resized = comfy.utils.common_upscale(samples.movedim(-1, 1), width, height, "lanczos", "disabled")
+    return resized.movedim(1, -1)
+
+
+def _letterbox(samples: torch.Tensor, width: int, height: int) -> tuple[torch.Tensor, tuple[int, int, int, int]]:
+    """Fit ``samples`` inside ``width`` x ``height`` without distortion, padding with black.
+
+    Returns the padded batch and the ``(x, y, w, h)`` of the content within it.
+    """
+    source_width, source_height = int(samples.shape[2]), int(samples.shape[1])
+    scale = min(width / source_width, height / source_height)
+    content_width = max(1, min(width, int(round(source_width * scale))))
+    content_height = max(1, min(height, int(round(source_height * scale))))
+    x, y = (width - content_width) // 2, (height - content_height) // 2
+    padded = samples.new_zeros((samples.shape[0], height, width, samples.shape[3]))
+    padded[:, y : y + content_height, x : x + content_width, :] = _resize(samples, content_width, content_height)
+    return padded, (x, y, content_width, content_height)
+
+
+async def _wait_for_selection(
+    image,
+    node_id: str,
+    max_resolution,
+    original_size,
+    preview_max_size,
+    preview_format,
+    preview_quality,
+) -> dict[str, Any]:
+    """Show the browser editor and wait for its submit or cancel payload."""
+    output_dir = folder_paths.get_temp_directory()
+    os.makedirs(output_dir, exist_ok=True)
+    image_height, image_width = int(image.shape[1]), int(image.shape[2])
+    pixels = await asyncio.to_thread(_preview_pixels, image[0], int(preview_max_size))
+    filename = await asyncio.to_thread(
+        _preview_file,
+        pixels,
+        str(preview_format),
+        int(preview_quality),
+        output_dir,
+    )
+
+    token, future = _begin_wait(node_id, image, int(preview_max_size), int(preview_quality))
+    PromptServer.instance.send_sync(
+        "flow_assistor_marquee_show",
+        {
+            "node_id": node_id,
+            "token": token,
+            "filename": filename,
+            "max_resolution": int(max_resolution),
+            "original_size": bool(original_size),
+            "source_width": image_width,
+            "source_height": image_height,
+            "frame_count": int(image.shape[0]),
+            "preview_max_size": int(preview_max_size),
+        },
+    )
+
+    try:
+        payload = await asyncio.wait_for(future, timeout=WAIT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError as exc:
+        raise TimeoutError("[VisualMarquee] Timed out waiting for selection.") from exc
+    finally:
+        _finish_wait(node_id, token)
+    return payload
+
+
+def _apply_selection(
+    image,
+    payload: dict[str, Any],
+    max_resolution,
+    original_size,
+    force_multiple_of_8,
+) -> io.NodeOutput:
+    """Crop ``image`` according to a submit payload."""
+    image_height, image_width = int(image.shape[1]), int(image.shape[2])
+    if payload.get("__action__") == "cancel":
+        raise RuntimeError("[VisualMarquee] Cancelled by user.")
+    crop_data = payload.get("crop_data")
+    if not isinstance(crop_data, dict):
+        raise RuntimeError("[VisualMarquee] crop_data missing or invalid.")
+
+    batch = int(image.shape[0])
+    frame_crops = payload.get("frame_crops")
+    if isinstance(frame_crops, list) and frame_crops:
+        if len(frame_crops) != batch:
+            raise ValueError(
+                f"[VisualMarquee] frame_crops has {len(frame_crops)} rectangles but the image batch has {batch} frames."
+            )
+        rects = [_clamp_rect(crop, image_width, image_height) for crop in frame_crops]
+    else:
+        rects = [_clamp_rect(crop_data, image_width, image_height)]
+
+    mask = None
+
+    if len(set(rects)) == 1:
+        x, y, width, height = rects[0]
+        output_width, output_height = _output_size(
+            width, height, bool(original_size), int(max_resolution), bool(force_multiple_of_8)
+        )
+        final_image = _resize(image[:, y : y + height, x : x + width, :], output_width, output_height)
+        tile_data = {
+            "original_bbox": (x, y, width, height),
+            "target_size": (int(output_width), int(output_height)),
+            "original_image_shape": (image_height, image_width),
+            "original_size_mode": bool(original_size),
+        }
+    else:
+        # Per-frame crops share one output size so they stay a single batch.
+        # Each crop is letterboxed to keep its aspect ratio; TILE_DATA keeps
+        # its box and where its content sits so the compositor can undo this.
+        output_width, output_height = _output_size(
+            max(rect[2] for rect in rects),
+            max(rect[3] for rect in rects),
+            bool(original_size),
+            int(max_resolution),
+            bool(force_multiple_of_8),
+        )
+        frames, contents = [], []
+        mask = torch.zeros((batch, output_height, output_width), dtype=torch.float32, device=image.device)
+        for index, (x, y, w, h) in enumerate(rects):
+            frame, content = _letterbox(image[index : index + 1, y : y + h, x : x + w, :], output_width, output_height)
+            frames.append(frame)
+            contents.append(content)
+            cx, cy, cw, ch = content
+            mask[index, cy : cy + ch, cx : cx + cw] = 1.0
+        final_image = torch.cat(frames)
+        tile_data = {
+            "tiles": [
+                {
+                    "original_bbox": rect,
+                    "batch_index": index,
+                    "content_bbox": (
+                        cx / output_width,
+                        cy / output_height,
+                        cw / output_width,
+                        ch / output_height,
+                    ),
+                }
+                for index, (rect, (cx, cy, cw, ch)) in enumerate(zip(rects, contents))
+            ],
+            "target_size": (int(output_width), int(output_height)),
+            "original_image_shape": (image_height, image_width),
+            "original_size_mode": bool(original_size),
+        }
+
+    if mask is None:
+        mask = torch.ones(
+            (final_image.shape[0], final_image.shape[1], final_image.shape[2]),
+            dtype=torch.float32,
+            device=final_image.device,
+        )
+    return io.NodeOutput(final_image, mask, tile_data)
+
+
 class VisualMarqueeSelection(io.ComfyNode):
     """Pause execution until a browser crop selection is submitted or cancelled."""
 
@@ -135,6 +559,35 @@ class VisualMarqueeSelection(io.ComfyNode):
                 io.Int.Input("max_resolution", default=1024, min=512, max=4096),
                 io.Boolean.Input("original_size", default=True),
                 io.Boolean.Input("force_multiple_of_8", default=True),
+                io.Int.Input(
+                    "preview_max_size",
+                    default=1536,
+                    min=256,
+                    max=8192,
+                    optional=True,
+                    tooltip="Longest edge of the browser preview. Crops are still taken at full resolution.",
+                ),
+                io.Combo.Input("preview_format", options=list(_PREVIEW_FORMATS), default="jpeg", optional=True),
+                io.Int.Input("preview_quality", default=85, min=1, max=100, optional=True),
+                io.String.Input(
+                    "crop_json",
+                    default="",
+                    multiline=True,
+                    optional=True,
+                    tooltip='Headless selection, e.g. {"x": 0, "y": 0, "w": 512, "h": 512} or a list with one rectangle per frame.',
+                ),
+                io.String.Input(
+                    "queue_key",
+                    default="",
+                    optional=True,
+                    tooltip="Key API clients must send with enqueue and clear_queue. Queued selections are only used when this is set.",
+                ),
+                io.Boolean.Input(
+                    "interactive",
+                    default=True,
+                    optional=True,
+                    tooltip="When off, the node never waits for the browser and fails if no queued or crop_json selection exists.",
+                ),
             ],
             outputs=[
                 io.Image.Output(display_name="cropped_image"),
@@ -157,98 +610,40 @@ class VisualMarqueeSelection(io.ComfyNode):
         max_resolution,
         original_size=True,
         force_multiple_of_8=True,
+        preview_max_size=1536,
+        preview_format="jpeg",
+        preview_quality=85,
+        crop_json="",
+        interactive=True,
+        queue_key="",
     ) -> io.NodeOutput:
         node_id = normalize_node_id(getattr(cls.hidden, "unique_id", None)) or uuid.uuid4().hex
-        output_dir = folder_paths.get_temp_directory()
-        os.makedirs(output_dir, exist_ok=True)
-
-        image_array = 255.0 * image[0].detach().cpu().numpy()
-        image_array = np.clip(image_array, 0, 255).astype(np.uint8)
-        preview = Image.fromarray(image_array)
-        filename = f"marquee_preview_{_safe_filename_component(node_id)}.png"
-        full_path = os.path.join(output_dir, filename)
-        await asyncio.to_thread(preview.save, full_path)
-
-        token, future = _begin_wait(node_id)
-        PromptServer.instance.send_sync(
-            "flow_assistor_marquee_show",
-            {
-                "node_id": node_id,
-                "token": token,
-                "filename": filename,
-                "max_resolution": int(max_resolution),
-                "original_size": bool(original_size),
-            },
-        )
 
-        try:
-            payload = await asyncio.wait_for(future, timeout=WAIT_TIMEOUT_SECONDS)
-        except asyncio.TimeoutError as exc:
-            raise TimeoutError("[VisualMarquee] Timed out waiting for selection.") from exc
-        finally:
-            _finish_wait(node_id, token)
-            try:
-                await asyncio.to_thread(os.remove, full_path)
-            except FileNotFoundError:
-                pass
-            except OSError as exc:
-                print(f"[VisualMarquee] Could not remove preview {full_path}: {exc}")
-
-        if payload.get("__action__") == "cancel":
-            raise RuntimeError("[VisualMarquee] Cancelled by user.")
-        crop_data = payload.get("crop_data")
-        if not isinstance(crop_data, dict):
-            raise RuntimeError("[VisualMarquee] crop_data missing or invalid.")
-
-        image_height, image_width = int(image.shape[1]), int(image.shape[2])
-        x = int(round(float(crop_data.get("x", 0))))
-        y = int(round(float(crop_data.get("y", 0))))
-        width = int(round(float(crop_data.get("w", 512))))
-        height = int(round(float(crop_data.get("h", 512))))
-
-        x = max(0, min(x, image_width - 1))
-        y = max(0, min(y, image_height - 1))
-        width = max(1, min(width, image_width - x))
-        height = max(1, min(height, image_height - y))
-        cropped = image[:, y : y + height, x : x + width, :]
-
-        if original_size:
-            final_image = cropped
-            output_width, output_height = width, height
-        else:
-            scale = float(max_resolution) / float(max(width, height))
-            output_width = max(1, int(round(width * scale)))
-            output_height = max(1, int(round(height * scale)))
-            if force_multiple_of_8:
-                output_width = max(8, (output_width // 8) * 8)
-                output_height = max(8, (output_height // 8) * 8)
-            samples = cropped.movedim(-1, 1)
-            resized = comfy.utils.common_upscale(
-                samples,
-                output_width,
-                output_height,
-                "lanczos",
-                "disabled",
+        # Queued API selections win over crop_json; either one resolves the
+        # node without parking the executor on a browser round-trip.
+        payload = _take_queued(node_id, str(queue_key or "").strip()) or _parse_crop_json(crop_json)
+        if payload is None:
+            if not interactive:
+                raise RuntimeError(
+                    f"[VisualMarquee] No queued selection or crop_json for node_id={node_id} "
+                    "and interactive mode is off."
+                )
+            payload = await _wait_for_selection(
+                image,
+                node_id,
+                max_resolution,
+                original_size,
+                preview_max_size,
+                preview_format,
+                preview_quality,
             )
-            final_image = resized.movedim(1, -1)
-
-        mask = torch.ones(
-            (final_image.shape[0], final_image.shape[1], final_image.shape[2]),
-            dtype=torch.float32,
-            device=final_image.device,
-        )
-        tile_data = {
-            "original_bbox": (x, y, width, height),
-            "target_size": (int(output_width), int(output_height)),
-            "original_image_shape": (image_height, image_width),
-            "original_size_mode": bool(original_size),
-        }
-        return io.NodeOutput(final_image, mask, tile_data)
+        return _apply_selection(image, payload, max_resolution, original_size, force_multiple_of_8)
 
 
 __all__ = [
     "VisualMarqueeSelection",
     "submit_crop_handler",
+    "marquee_frame_handler",
     "_begin_wait",
     "_set_payload",
     "_finish_wait",
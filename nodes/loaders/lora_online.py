@@ -4,10 +4,14 @@ from __future__ import annotations
 
 import asyncio
 import gc
+import json
 import os
 import re
 import subprocess
 import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 from pathlib import Path
 from urllib.parse import unquote, urlparse
 
@@ -15,12 +19,15 @@ import aiohttp
 import torch
 from aiohttp import web
 
+import comfy.model_management as model_management
 import comfy.sd
 import comfy.utils
 import folder_paths
 from comfy_api.latest import ComfyAPI, io
 from ..categories import LOADERS
 
+from ...download_manager import get_download_manager, sha256_file
+
 
 _API = ComfyAPI()
 _HEADERS = {
@@ -31,7 +38,12 @@ _HEADERS = {
     "Referer": "https://civitai.com/",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
 }
-_CHUNK_SIZE = 1024 * 1024
+# Parsed LoRA tensors kept in RAM between executions. Entries are dropped in
+# least-recently-used order when the budget is exceeded or when free system
+# memory falls below the pressure threshold.
+_LORA_CACHE_BYTES = 2 * 1024**3
+_LORA_CACHE_MIN_FREE_RAM = 2 * 1024**3
+_INDEX_FILENAME = ".flow_assistor_index.json"
 
 
 def get_target_folder() -> str:
@@ -84,7 +96,7 @@ async def resolve_civitai_url(session: aiohttp.ClientSession, url: str) -> str:
     target_version_id = int(version_match.group(1)) if version_match else None
     api_url = f"https://civitai.com/api/v1/models/{model_id}"
     try:
-        async with session.get(api_url) as response:
+        async with session.get(api_url, headers=_HEADERS) as response:
             response.raise_for_status()
             data = await response.json()
         versions = data.get("modelVersions") or []
@@ -115,57 +127,273 @@ async def _set_progress(value: int, max_value: int) -> None:
         pass
 
 
-async def download_file(
-    session: aiohttp.ClientSession,
-    url: str,
-    destination: str,
-    force: bool = False,
-) -> str:
+def _civitai_version_key(url: str) -> str | None:
+    match = re.search(r"modelVersionId=(\d+)", url) or re.search(
+        r"civitai\.com/api/download/models/(\d+)", url
+    )
+    return f"civitai-version:{match.group(1)}" if match else None
+
+
+class _LoRAIndex:
+    """Persistent URL to file mapping stored beside the downloaded LoRAs.
+
+    Entries are keyed by the URL as entered and, for Civitai links, by the
+    model version id so different URL spellings of one version share a file.
+    A hit is trusted only while the file still exists with the recorded size.
+    """
+
+    def __init__(self, folder: str) -> None:
+        self.path = Path(folder) / _INDEX_FILENAME
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._loaded_mtime: int | None = None
+
+    def _refresh_locked(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            self._entries = {}
+            self._loaded_mtime = None
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            entries = data.get("entries") if isinstance(data, dict) else None
+            self._entries = entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError) as exc:
+            print(f"[LoRA Online] Ignoring unreadable index {self.path}: {exc}")
+            self._entries = {}
+        self._loaded_mtime = mtime
+
+    def _write_locked(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.write_text(
+            json.dumps({"version": 1, "entries": self._entries}, indent=1, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(temporary, self.path)
+        self._loaded_mtime = self.path.stat().st_mtime_ns
+
+    @staticmethod
+    def _keys(url: str, resolved_url: str | None = None) -> list[str]:
+        keys = [url]
+        for candidate in (url, resolved_url):
+            version_key = _civitai_version_key(candidate) if candidate else None
+            if version_key and version_key not in keys:
+                keys.append(version_key)
+        return keys
+
+    def lookup(self, url: str) -> str | None:
+        with self._lock:
+            self._refresh_locked()
+            for key in self._keys(url):
+                entry = self._entries.get(key)
+                if not isinstance(entry, dict):
+                    continue
+                file_path = self.path.parent / str(entry.get("filename", ""))
+                try:
+                    if file_path.is_file() and file_path.stat().st_size == int(entry.get("size", -1)):
+                        return str(file_path)
+                except (OSError, TypeError, ValueError):
+                    continue
+            return None
+
+    def record(self, url: str, resolved_url: str, file_path: str) -> None:
+        path = Path(file_path)
+        stat = path.stat()
+        version_key = _civitai_version_key(resolved_url) or _civitai_version_key(url)
+        entry = {
+            "filename": path.name,
+            "size": stat.st_size,
+            "sha256": sha256_file(path),
+            "resolved_url": resolved_url,
+            "version_id": version_key.split(":", 1)[1] if version_key else None,
+        }
+        with self._lock:
+            self._refresh_locked()
+            for key in self._keys(url, resolved_url):
+                self._entries[key] = entry
+            self._write_locked()
+
+    def forget(self, url: str | None = None, file_path: str | None = None) -> None:
+        with self._lock:
+            self._refresh_locked()
+            keys = set(self._keys(url)) if url else set()
+            filename = Path(file_path).name if file_path else None
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if key in keys or (filename and isinstance(entry, dict) and entry.get("filename") == filename)
+            ]
+            if not stale:
+                return
+            for key in stale:
+                self._entries.pop(key, None)
+            self._write_locked()
+
+
+_INDEXES: dict[str, _LoRAIndex] = {}
+
+
+def _lora_index(folder: str) -> _LoRAIndex:
+    folder = os.path.normpath(folder)
+    index = _INDEXES.get(folder)
+    if index is None:
+        index = _INDEXES[folder] = _LoRAIndex(folder)
+    return index
+
+
+async def download_file(url: str, destination: str, force: bool = False, record: bool = True) -> str:
+    """Download ``url`` into ``destination`` and return the file path.
+
+    With ``record`` off the file is not hashed or added to the index, for
+    downloads that are deleted right after use.
+    """
+    index = _lora_index(destination)
+    if force:
+        await asyncio.to_thread(index.forget, url)
+    else:
+        cached_path = await asyncio.to_thread(index.lookup, url)
+        if cached_path is not None:
+            print(f"[LoRA Online] Using indexed file without network access: {cached_path}")
+            return cached_path
+
+    manager = get_download_manager()
+    session = await manager.session()
     final_url = await resolve_civitai_url(session, url)
     os.makedirs(destination, exist_ok=True)
 
-    async with session.get(final_url, allow_redirects=True) as response:
-        response.raise_for_status()
-        filename = get_filename_from_content_disposition(response.headers.get("content-disposition"))
+    def target_path(response_url: str, headers: Mapping[str, str]) -> Path:
+        filename = get_filename_from_content_disposition(headers.get("Content-Disposition"))
         if not filename:
-            filename = _fallback_filename(str(response.url or final_url))
-        filename = sanitize_filename(filename)
-        file_path = os.path.join(destination, filename)
-        partial_path = file_path + ".part"
+            filename = _fallback_filename(response_url or final_url)
+        return Path(destination) / sanitize_filename(filename)
+
+    path = await manager.download(
+        final_url,
+        target_path,
+        headers=_HEADERS,
+        force=force,
+        progress=_set_progress,
+        label="LoRA Online",
+    )
+    if not record:
+        return str(path)
+    try:
+        await asyncio.to_thread(index.record, url, final_url, str(path))
+    except OSError as exc:
+        # The index only saves future round-trips; the download itself is fine.
+        print(f"[LoRA Online] Could not update the download index: {exc}")
+    return str(path)
 
-        if os.path.exists(file_path) and not force:
-            return file_path
 
-        total_size = int(response.headers.get("content-length", "0") or 0)
-        progress_max = total_size if total_size > 0 else 1
-        written = 0
-        try:
-            with open(partial_path, "wb") as handle:
-                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
-                    if not chunk:
-                        continue
-                    handle.write(chunk)
-                    written += len(chunk)
-                    await _set_progress(min(written, progress_max), progress_max)
-            os.replace(partial_path, file_path)
-            await _set_progress(progress_max, progress_max)
-            return file_path
-        except BaseException:
-            try:
-                os.remove(partial_path)
-            except FileNotFoundError:
-                pass
-            raise
-
-
-def _load_lora(model, file_path: str, strength_model: float):
-    lora = comfy.utils.load_torch_file(file_path, safe_load=True)
+def _state_dict_bytes(lora: Mapping) -> int:
+    total = 0
+    for value in lora.values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+    return total
+
+
+def _free_ram() -> int | None:
+    try:
+        return int(model_management.get_free_memory(torch.device("cpu")))
+    except Exception:
+        return None
+
+
+class _LoRACache:
+    """Byte-budgeted LRU of loaded LoRA state dicts keyed by file identity."""
+
+    def __init__(self, max_bytes: int, min_free_ram: int) -> None:
+        self.max_bytes = int(max_bytes)
+        self.min_free_ram = int(min_free_ram)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: OrderedDict[tuple[str, int, int], tuple[dict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(file_path: str) -> tuple[str, int, int]:
+        stat = os.stat(file_path)
+        return os.path.realpath(file_path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: tuple[str, int, int]) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple[str, int, int], lora: dict) -> None:
+        size = _state_dict_bytes(lora)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # A new mtime or size for the same path replaces the stale parse.
+            for stale in [item for item in self._entries if item[0] == key[0] and item != key]:
+                self._bytes -= self._entries.pop(stale)[1]
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (lora, size)
+            self._bytes += size
+            self._trim_locked(self.max_bytes)
+
+    def relieve_pressure(self) -> None:
+        free = _free_ram()
+        if free is None or free >= self.min_free_ram:
+            return
+        with self._lock:
+            self._trim_locked(max(0, self._bytes - (self.min_free_ram - free)))
+
+    def _trim_locked(self, budget: int) -> None:
+        while self._entries and self._bytes > budget:
+            _key, (_lora, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def describe(self) -> str:
+        with self._lock:
+            return (
+                f"hits={self.hits}, misses={self.misses}, evictions={self.evictions}, "
+                f"entries={len(self._entries)}, cached={self._bytes / (1024 * 1024):.0f} MiB"
+            )
+
+
+_LORA_CACHE = _LoRACache(_LORA_CACHE_BYTES, _LORA_CACHE_MIN_FREE_RAM)
+
+
+def _load_lora(model, file_path: str, strength_model: float, use_cache: bool = True):
+    lora = None
+    key = None
+    if use_cache:
+        _LORA_CACHE.relieve_pressure()
+        key = _LoRACache.key_for(file_path)
+        lora = _LORA_CACHE.get(key)
+    if lora is None:
+        lora = comfy.utils.load_torch_file(file_path, safe_load=True)
+        if key is not None:
+            _LORA_CACHE.put(key, lora)
+    if use_cache:
+        print(f"[LoRA Online] State dict cache: {_LORA_CACHE.describe()}")
     model_lora, _ = comfy.sd.load_lora_for_models(model, None, lora, strength_model, 0)
     return model_lora, lora
 
 
 def _delete_download(file_path: str, lora_object) -> None:
     del lora_object
+    try:
+        _lora_index(os.path.dirname(file_path)).forget(file_path=file_path)
+    except OSError as exc:
+        print(f"[LoRA Online] Could not update the download index: {exc}")
     gc.collect()
     if hasattr(torch, "cuda"):
         torch.cuda.empty_cache()
@@ -216,15 +444,15 @@ class LoRAOnlineNode(io.ComfyNode):
             return io.NodeOutput(model)
 
         destination = get_target_folder()
-        timeout = aiohttp.ClientTimeout(total=None, connect=30, sock_read=120)
         try:
-            async with aiohttp.ClientSession(headers=_HEADERS, timeout=timeout) as session:
-                file_path = await download_file(
-                    session,
-                    clean_url,
-                    destination,
-                    force=bool(force_redownload),
-                )
+            file_path = await download_file(
+                clean_url,
+                destination,
+                force=bool(force_redownload),
+                # Files deleted after generation are never looked up again,
+                # so skip hashing them into the index.
+                record=bool(save_model),
+            )
         except Exception as exc:
             print(f"[LoRA Online] Download failed: {exc}")
             return io.NodeOutput(model)
@@ -235,6 +463,9 @@ class LoRAOnlineNode(io.ComfyNode):
                 model,
                 file_path,
                 float(strength_model),
+                # Files deleted after generation cannot be reused, so do not
+                # spend cache budget on them.
+                bool(save_model),
             )
         except Exception as exc:
             print(f"[LoRA Online] File is not a valid LoRA: {exc}")
@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 import torch
 from comfy.samplers import KSAMPLER
 from comfy_api.latest import io
@@ -66,8 +69,8 @@ def _warp_time_density(sigmas, factor, mask):
     
     # How far are we between y0 and y1?
     # Avoid div/0
-    denom = (y1 - y0)
-    denom[denom < 1e-6] = 1e-6 
+    # clamp_min keeps this on-device; boolean-mask assignment would sync.
+    denom = (y1 - y0).clamp_min(1e-6)
     
     frac = (real_time_grid - y0) / denom
     
@@ -118,14 +121,12 @@ def _enforce_monotonicity(sigmas):
     Heals the curve. boosting sigmas can make sigma[i] > sigma[i-1], 
     which breaks Euler/DPM. This forces the curve to go down only.
     """
-    # We sweep backwards. The 'current' step must be >= 'next' step.
-    # If we boosted the middle, we might have created a "bump".
-    # We flatten the bump.
-    fixed = sigmas.clone()
-    for i in range(len(fixed) - 2, -1, -1):
-        if fixed[i] < fixed[i+1]:
-            fixed[i] = fixed[i+1] # Clamp to next value
-    return fixed
+    # Every step must be >= every later step, so each value becomes the max of
+    # itself and everything after it: a reverse cumulative max. This flattens
+    # "bumps" exactly like a backwards sweep, without a Python loop or
+    # per-element device syncs.
+    flipped = torch.flip(sigmas, dims=(0,))
+    return torch.flip(torch.cummax(flipped, dim=0).values, dims=(0,))
 
 # ----------------------------
 # Main Processor
@@ -166,6 +167,59 @@ def process_ultimate_sigmas(sigmas: torch.Tensor,
     return work_sigmas.to(dtype=original_dtype)
 
 
+# ----------------------------
+# Schedule Memoization
+# ----------------------------
+
+# Sampler wrappers see the same scheduler output for every prompt in a batch,
+# so transformed schedules are memoized on their exact values and options.
+_SCHEDULE_CACHE_SIZE = 32
+_SCHEDULE_CACHE: "OrderedDict[tuple, torch.Tensor]" = OrderedDict()
+_SCHEDULE_CACHE_LOCK = threading.Lock()
+
+
+def _schedule_key(sigmas, factor, boost, start_p, end_p):
+    # Sigma schedules are tiny, so one host copy for the key is cheaper than
+    # the mask, CDF warp, and searchsorted it lets us skip.
+    values = tuple(sigmas.detach().to(device="cpu", dtype=torch.float64).flatten().tolist())
+    return (
+        values,
+        tuple(sigmas.shape),
+        str(sigmas.dtype),
+        str(sigmas.device),
+        float(factor),
+        float(boost),
+        float(start_p),
+        float(end_p),
+    )
+
+
+def cached_ultimate_sigmas(sigmas: torch.Tensor,
+                           factor: float,
+                           boost: float,
+                           start_p: float,
+                           end_p: float) -> torch.Tensor:
+    """Memoized ``process_ultimate_sigmas`` for repeated sampler invocations."""
+    if factor == 1.0 and boost == 0.0:
+        return sigmas
+
+    key = _schedule_key(sigmas, factor, boost, start_p, end_p)
+    with _SCHEDULE_CACHE_LOCK:
+        cached = _SCHEDULE_CACHE.get(key)
+        if cached is not None:
+            _SCHEDULE_CACHE.move_to_end(key)
+            # Samplers may modify schedules in place; never hand out the cached copy.
+            return cached.clone()
+
+    result = process_ultimate_sigmas(sigmas, factor, boost, start_p, end_p)
+    with _SCHEDULE_CACHE_LOCK:
+        _SCHEDULE_CACHE[key] = result.detach().clone()
+        _SCHEDULE_CACHE.move_to_end(key)
+        while len(_SCHEDULE_CACHE) > _SCHEDULE_CACHE_SIZE:
+            _SCHEDULE_CACHE.popitem(last=False)
+    return result
+
+
 def enhance_sampler_wrapper(model, x, sigmas, *args, 
                              de_source_sampler=None, 
                              de_factor=1.0, 
@@ -176,7 +230,7 @@ def enhance_sampler_wrapper(model, x, sigmas, *args,
     if de_source_sampler is None:
         return x
 
-    new_sigmas = process_ultimate_sigmas(sigmas, de_factor, de_boost, de_start, de_end)
+    new_sigmas = cached_ultimate_sigmas(sigmas, de_factor, de_boost, de_start, de_end)
 
     return de_source_sampler.sampler_function(
         model, x, new_sigmas, *args,
@@ -263,5 +317,6 @@ class UltimateDetailSigmasNode(io.ComfyNode):
 __all__ = [
     "UltimateDetailSamplerNode",
     "UltimateDetailSigmasNode",
+    "cached_ultimate_sigmas",
     "process_ultimate_sigmas",
 ]
@@ -4,11 +4,13 @@ from .camera_angle import CameraAngleControl
 from .display_text import DisplayText
 from .prompt_enrichment import CLIPTextEncodePromptEnrichment
 from .prompt_queue import PromptQueue
+from .prompt_queue_file import PromptQueueFromFile
 from .prompt_queue_folder import PromptQueueFromFolder
 
 NODE_CLASSES = (
     PromptQueue,
     PromptQueueFromFolder,
+    PromptQueueFromFile,
     CLIPTextEncodePromptEnrichment,
     DisplayText,
     CameraAngleControl,
@@ -17,6 +19,7 @@ NODE_CLASSES = (
 __all__ = [
     "PromptQueue",
     "PromptQueueFromFolder",
+    "PromptQueueFromFile",
     "CLIPTextEncodePromptEnrichment",
     "DisplayText",
     "CameraAngleControl",
@@ -0,0 +1,150 @@
+"""In-memory cache of CLIP conditioning for repeated prompts.
+
+Prompt queues often feed the same text and preset combinations through the
+text encoder many times. Encoding is deterministic for a given text encoder,
+patch set, and prompt, so results are kept in a byte-bounded LRU on the text
+encoder's offload device and reused.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import weakref
+from collections import OrderedDict, deque
+from typing import Any
+
+import comfy.model_management as model_management
+
+
+_MAX_BYTES = 256 * 1024 * 1024
+
+# Text encoder models get a number that is never reused, unlike ``id()``, which
+# a later model can inherit once the old one is garbage collected.
+_MODEL_TOKENS: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+_TOKEN_COUNTER = itertools.count(1)
+_TOKEN_LOCK = threading.Lock()
+
+
+def _clip_model(clip: Any) -> Any:
+    model = getattr(getattr(clip, "patcher", None), "model", None)
+    return model if model is not None else getattr(clip, "cond_stage_model", None)
+
+
+def model_token(model: Any) -> int | None:
+    """Return a number unique to ``model`` for its lifetime, or ``None`` if untrackable."""
+    try:
+        with _TOKEN_LOCK:
+            token = _MODEL_TOKENS.get(model)
+            if token is None:
+                token = next(_TOKEN_COUNTER)
+                _MODEL_TOKENS[model] = token
+            return token
+    except TypeError:
+        return None
+
+
+def clip_identity(clip: Any) -> tuple | None:
+    """Describe everything about a CLIP object that changes its encodings.
+
+    Cloning a CLIP keeps its ``patches_uuid`` and adding LoRA patches replaces
+    it, so patched and unpatched encoders never share entries. Returns
+    ``None`` when the model cannot be tracked, which disables caching.
+    """
+    patcher = getattr(clip, "patcher", None)
+    token = model_token(_clip_model(clip))
+    if token is None:
+        return None
+    options = getattr(clip, "tokenizer_options", None) or {}
+    return (
+        token,
+        str(getattr(patcher, "patches_uuid", "")),
+        getattr(clip, "layer_idx", None),
+        repr(sorted(options.items())),
+    )
+
+
+def _offload_device(clip: Any) -> Any:
+    device = getattr(getattr(clip, "patcher", None), "offload_device", None)
+    return device if device is not None else model_management.intermediate_device()
+
+
+def _tensor_bytes(value: Any) -> int:
+    if value is None:
+        return 0
+    return int(value.element_size() * value.nelement())
+
+
+class ConditioningCache:
+    """Byte-bounded LRU of ``(conditioning, pooled)`` pairs.
+
+    Keys start with a ``clip_identity`` tuple. Entries for a text encoder are
+    dropped once that model is garbage collected.
+    """
+
+    def __init__(self, max_bytes: int = _MAX_BYTES) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[Any, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._watched: set[int] = set()
+        # Finalizers may run during garbage collection on any thread, even
+        # while this cache's lock is held, so they only queue the token.
+        self._released: deque[int] = deque()
+
+    def _purge_released_locked(self) -> None:
+        released = set()
+        while self._released:
+            released.add(self._released.popleft())
+        if not released:
+            return
+        self._watched -= released
+        for key in [key for key in self._entries if key[0][0] in released]:
+            self._bytes -= self._entries.pop(key)[2]
+
+    def get(self, key: tuple) -> tuple[Any, Any] | None:
+        with self._lock:
+            self._purge_released_locked()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key: tuple, conditioning: Any, pooled: Any, clip: Any) -> tuple[Any, Any]:
+        """Store an encoding on the offload device and return the stored tensors."""
+        device = _offload_device(clip)
+        conditioning = conditioning.to(device)
+        if pooled is not None:
+            pooled = pooled.to(device)
+        size = _tensor_bytes(conditioning) + _tensor_bytes(pooled)
+        if size > self.max_bytes:
+            return conditioning, pooled
+        token = key[0][0]
+        with self._lock:
+            self._purge_released_locked()
+            if token not in self._watched:
+                self._watched.add(token)
+                weakref.finalize(_clip_model(clip), self._released.append, token)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (conditioning, pooled, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _key, (_conditioning, _pooled, stale) = self._entries.popitem(last=False)
+                self._bytes -= stale
+        return conditioning, pooled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._released.clear()
+
+
+__all__ = ["ConditioningCache", "clip_identity", "model_token"]
@@ -1,7 +1,13 @@
 """CLIP text encoding with built-in enrichment presets."""
 
+import math
+from typing import Any
+
+import torch
+
 from comfy_api.latest import io
 from ..categories import TEXT
+from .conditioning_cache import ConditioningCache, clip_identity
 
 
 PRESETS = {
@@ -28,6 +34,68 @@ PRESETS = {
 }
 
 
+_CONDITIONING_CACHE = ConditioningCache()
+# Same limit as ComfyUI's CONDCrossAttn.can_concat: never tile a sequence to
+# more than four times the shortest length.
+_MAX_REPEAT = 4
+
+
+def _item(values: list, index: int) -> Any:
+    # List inputs shorter than the longest one repeat their last value, as in
+    # ComfyUI's own list mapping.
+    return values[min(index, len(values) - 1)]
+
+
+def encode_prompt(clip: Any, prompt: str) -> tuple[Any, Any]:
+    """Encode ``prompt`` with ``clip``, reusing a cached result when possible."""
+    identity = clip_identity(clip)
+    key = (identity, prompt)
+    if identity is not None:
+        cached = _CONDITIONING_CACHE.get(key)
+        if cached is not None:
+            return cached
+    tokens = clip.tokenize(prompt)
+    conditioning, pooled = clip.encode_from_tokens(tokens, return_pooled=True)
+    if identity is None:
+        return conditioning, pooled
+    return _CONDITIONING_CACHE.put(key, conditioning, pooled, clip)
+
+
+def parse_preset_list(value: str) -> list[str]:
+    """Return the preset names listed in ``value``; ``all`` selects every preset."""
+    names = [item.strip() for item in str(value).replace("\n", ",").split(",") if item.strip()]
+    selected = []
+    for name in names:
+        if name.lower() == "all":
+            selected.extend(PRESETS)
+        elif name in PRESETS:
+            selected.append(name)
+        else:
+            print(f"[Prompt Enrichment] Unknown preset {name!r} skipped")
+    return selected
+
+
+def batch_conditioning(encodings: list[tuple[Any, Any]]) -> tuple[Any, Any] | None:
+    """Stack single-prompt encodings into one batched conditioning.
+
+    Sequences of different lengths are repeated up to their least common
+    multiple, the same way ComfyUI batches mismatched conditioning in the
+    sampler. That is exact for cross-attention models; for joint-attention
+    models such as SD3 or Flux the repeated text tokens shift the attention
+    weights slightly. Returns ``None`` when the lengths are too far apart to
+    tile within ``_MAX_REPEAT``.
+    """
+    lengths = [conditioning.shape[1] for conditioning, _pooled in encodings]
+    target = math.lcm(*lengths)
+    if target // min(lengths) > _MAX_REPEAT:
+        return None
+    conditioning = torch.cat(
+        [item.repeat(1, target // item.shape[1], 1) for item, _pooled in encodings]
+    )
+    pooled = [item for _conditioning, item in encodings]
+    return conditioning, (torch.cat(pooled) if all(item is not None for item in pooled) else None)
+
+
 class CLIPTextEncodePromptEnrichment(io.ComfyNode):
     @classmethod
     def define_schema(cls) -> io.Schema:
@@ -39,16 +107,67 @@ class CLIPTextEncodePromptEnrichment(io.ComfyNode):
                 io.Clip.Input("clip"),
                 io.String.Input("text", multiline=True, dynamic_prompts=True, default=""),
                 io.Combo.Input("preset", options=list(PRESETS), default="None"),
+                io.String.Input(
+                    "preset_list",
+                    multiline=True,
+                    default="",
+                    optional=True,
+                    tooltip="Preset names separated by commas or new lines, or 'all'. When set, "
+                    "the text is encoded separately for each listed preset and the results "
+                    "are stacked into one conditioning batch; 'preset' is ignored.",
+                ),
             ],
-            outputs=[io.Conditioning.Output()],
+            outputs=[io.Conditioning.Output(is_output_list=True)],
+            is_input_list=True,
         )
 
     @classmethod
-    def execute(cls, clip, text, preset) -> io.NodeOutput:
-        final_prompt = str(text).strip() + PRESETS.get(str(preset), "")
-        tokens = clip.tokenize(final_prompt)
-        conditioning, pooled = clip.encode_from_tokens(tokens, return_pooled=True)
-        return io.NodeOutput([[conditioning, {"pooled_output": pooled}]])
+    def execute(cls, clip, text, preset, preset_list=None) -> io.NodeOutput:
+        # Inputs arrive as lists so a prompt list is handled in one execution:
+        # duplicates are encoded once and repeats hit the conditioning cache.
+        clips = clip if isinstance(clip, list) else [clip]
+        texts = text if isinstance(text, list) else [text]
+        presets = preset if isinstance(preset, list) else [preset]
+        lists = preset_list if isinstance(preset_list, list) else [preset_list or ""]
+        count = max(len(clips), len(texts), len(presets), len(lists))
+
+        encoded: dict[tuple, tuple[Any, Any]] = {}
+
+        def encode(item_clip: Any, final_prompt: str) -> tuple[Any, Any]:
+            key = (id(item_clip), final_prompt)
+            if key not in encoded:
+                encoded[key] = encode_prompt(item_clip, final_prompt)
+            return encoded[key]
+
+        conditionings = []
+        for index in range(count):
+            item_clip = _item(clips, index)
+            base = str(_item(texts, index)).strip()
+            selected = parse_preset_list(_item(lists, index) or "")
+            if selected:
+                # One encoder pass per preset: encode_from_tokens returns only
+                # the first section's pooled output, so presets cannot share a
+                # call. Repeats are served from the conditioning cache.
+                encodings = [encode(item_clip, base + PRESETS[name]) for name in selected]
+                batched = batch_conditioning(encodings)
+                if batched is None:
+                    print(
+                        "[Prompt Enrichment] preset_list encodings differ too much in length to batch; "
+                        "returning one conditioning per preset"
+                    )
+                    conditionings.extend([[item, {"pooled_output": pooled}]] for item, pooled in encodings)
+                    continue
+                conditioning, pooled = batched
+            else:
+                conditioning, pooled = encode(item_clip, base + PRESETS.get(str(_item(presets, index)), ""))
+            conditionings.append([[conditioning, {"pooled_output": pooled}]])
+        return io.NodeOutput(conditionings)
 
 
-__all__ = ["CLIPTextEncodePromptEnrichment", "PRESETS"]
+__all__ = [
+    "CLIPTextEncodePromptEnrichment",
+    "PRESETS",
+    "batch_conditioning",
+    "encode_prompt",
+    "parse_preset_list",
+]
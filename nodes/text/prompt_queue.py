@@ -1,22 +1,75 @@
 """Stateful multiline prompt queue for ComfyUI V3."""
 
+import hashlib
+import re
+from array import array
+
 from comfy_api.latest import io
 from ..categories import TEXT
 
 from ...runtime_state import with_queue_state
 
 
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+class LineIndex:
+    """Start/end offsets of the processed lines of one prompt text.
+
+    The text is kept once and each line is sliced on access, so a 100k-line
+    list costs 16 bytes per line instead of one string object per line.
+    """
+
+    __slots__ = ("text", "flags", "starts", "ends")
+
+    def __init__(self, text: str, strip_lines: bool, skip_empty: bool) -> None:
+        self.text = text
+        self.flags = (bool(strip_lines), bool(skip_empty))
+        self.starts = array("q")
+        self.ends = array("q")
+        start = 0
+        for match in _LINE_BREAK.finditer(text):
+            self._add(start, match.start())
+            start = match.end()
+        self._add(start, len(text))
+
+    def _add(self, start: int, end: int) -> None:
+        strip_lines, skip_empty = self.flags
+        if strip_lines and start < end:
+            line = self.text[start:end]
+            stripped = line.lstrip()
+            if not stripped:
+                end = start
+            else:
+                start += len(line) - len(stripped)
+                end = start + len(stripped.rstrip())
+        if skip_empty and start == end:
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> str:
+        return self.text[self.starts[index] : self.ends[index]]
+
+
 def prepare_lines(prompts: str, strip_lines: bool, skip_empty: bool) -> list[str]:
-    lines = str(prompts).replace("\r\n", "\n").replace("\r", "\n").split("\n")
-    if strip_lines:
-        lines = [line.strip() for line in lines]
-    if skip_empty:
-        lines = [line for line in lines if line != ""]
-    return lines
+    lines = LineIndex(str(prompts), strip_lines, skip_empty)
+    return [lines[index] for index in range(len(lines))]
+
+
+def _config_digest(prompts: str, strip_lines: bool, skip_empty: bool) -> str:
+    digest = hashlib.blake2b(str(prompts).encode("utf-8", "surrogatepass"), digest_size=20)
+    digest.update(f"|{bool(strip_lines)}|{bool(skip_empty)}".encode("ascii"))
+    return digest.hexdigest()
 
 
 def _new_state() -> dict:
-    return {"index": 0, "lines": [], "last_conf": None, "reset_trigger": None}
+    # "_lines" is rebuilt from the prompts input, so only the content digest
+    # and the position are persisted by runtime_state.
+    return {"index": 0, "_lines": None, "last_conf": None, "reset_trigger": None}
 
 
 class PromptQueue(io.ComfyNode):
@@ -55,16 +108,23 @@ class PromptQueue(io.ComfyNode):
         node_id = getattr(cls.hidden, "unique_id", "unknown")
 
         def next_value(state: dict) -> str:
-            config = (str(prompts), bool(strip_lines), bool(skip_empty_lines))
-            if state["last_conf"] != config:
-                state["lines"] = prepare_lines(*config)
-                state["index"] = 0
-                state["last_conf"] = config
+            text = str(prompts)
+            flags = (bool(strip_lines), bool(skip_empty_lines))
+            lines = state.get("_lines")
+            # Comparing against the indexed text is a memcmp; the digest and
+            # the index are only rebuilt when the prompts actually change.
+            if lines is None or lines.flags != flags or lines.text != text:
+                config = _config_digest(text, *flags)
+                lines = LineIndex(text, *flags)
+                state["_lines"] = lines
+                if state["last_conf"] != config:
+                    state["index"] = 0
+                    state["last_conf"] = config
             if state["reset_trigger"] != int(reset_trigger):
                 state["index"] = 0
                 state["reset_trigger"] = int(reset_trigger)
 
-            lines = state["lines"]
+            lines = state["_lines"]
             if not lines:
                 return ""
 
@@ -93,4 +153,4 @@ class PromptQueue(io.ComfyNode):
         return io.NodeOutput(value)
 
 
-__all__ = ["PromptQueue", "prepare_lines"]
+__all__ = ["LineIndex", "PromptQueue", "prepare_lines"]
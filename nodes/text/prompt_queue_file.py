@@ -0,0 +1,300 @@
+"""Streaming prompt queue over one large text or JSONL file for ComfyUI V3."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from comfy_api.latest import io
+from ..categories import TEXT
+
+from ...runtime_state import with_queue_state
+
+
+_INDEX_VERSION = 2
+_SCAN_CHUNK_BYTES = 64 * 1024 * 1024
+_MAX_OPEN_CORPORA = 8
+_FEISTEL_ROUNDS = 4
+# Bytes that can never be part of a whitespace-only line. Lines made only of
+# other bytes may still hold Unicode whitespace, so they are decoded and
+# checked with ``str.strip`` like the lines that are served.
+_CONTENT = np.ones(256, dtype=bool)
+_CONTENT[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = False
+_CONTENT[0x80:] = False
+
+
+class _Corpus:
+    """A memory-mapped file plus its ``(start, end)`` line-offset index."""
+
+    __slots__ = ("mapping", "index")
+
+    def __init__(self, mapping: mmap.mmap | None, index: np.ndarray) -> None:
+        self.mapping = mapping
+        self.index = index
+
+    def __len__(self) -> int:
+        return int(self.index.shape[0])
+
+    def line(self, number: int, strip_line: bool) -> str:
+        start, end = (int(value) for value in self.index[number])
+        raw = self.mapping[start:end] if self.mapping is not None else b""
+        text = raw.decode("utf-8", errors="replace")
+        return text.strip() if strip_line else text
+
+
+_CORPORA_LOCK = threading.Lock()
+_CORPORA: OrderedDict[tuple, _Corpus] = OrderedDict()
+
+
+def _index_paths(path: Path, skip_empty: bool) -> tuple[Path, Path]:
+    suffix = ".fa-lines-nonempty" if skip_empty else ".fa-lines"
+    base = path.with_name(path.name + suffix)
+    return base.with_suffix(base.suffix + ".npy"), base.with_suffix(base.suffix + ".json")
+
+
+def build_line_index(data: np.ndarray, skip_empty: bool) -> np.ndarray:
+    """Return an ``(N, 2)`` array of line start/end byte offsets.
+
+    ``data`` is scanned in fixed-size chunks so a multi-GB file never needs a
+    full-size temporary. A trailing newline does not add an empty last line,
+    and ``\\r\\n`` endings are excluded from the line. ``skip_empty`` drops
+    lines that ``str.strip`` would leave empty.
+    """
+    size = int(data.shape[0])
+    if size == 0:
+        return np.zeros((0, 2), dtype=np.uint64)
+    breaks = [
+        np.flatnonzero(data[offset : offset + _SCAN_CHUNK_BYTES] == 10).astype(np.int64) + offset
+        for offset in range(0, size, _SCAN_CHUNK_BYTES)
+    ]
+    newlines = np.concatenate(breaks) if breaks else np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [size]))
+    if starts[-1] >= size:
+        starts, ends = starts[:-1], ends[:-1]
+    has_return = (ends > starts) & (data[np.maximum(ends - 1, 0)] == 13)
+    ends = ends - has_return
+
+    if skip_empty and starts.size:
+        keep = np.zeros(starts.shape[0], dtype=bool)
+        first = 0
+        while first < starts.shape[0]:
+            # Take as many whole lines as fit in one chunk (at least one).
+            limit = int(starts[first]) + _SCAN_CHUNK_BYTES
+            last = max(first + 1, int(np.searchsorted(ends, limit, side="right")))
+            byte_start, byte_end = int(starts[first]), int(ends[last - 1])
+            chunk = data[byte_start:byte_end]
+            line_starts, line_ends = starts[first:last] - byte_start, ends[first:last] - byte_start
+            content = np.concatenate(([0], np.cumsum(_CONTENT[chunk], dtype=np.int64)))
+            keep[first:last] = content[line_ends] - content[line_starts] > 0
+            non_ascii = np.concatenate(([0], np.cumsum(chunk >= 0x80, dtype=np.int64)))
+            unsure = ~keep[first:last] & (non_ascii[line_ends] - non_ascii[line_starts] > 0)
+            for line in np.flatnonzero(unsure) + first:
+                raw = data[int(starts[line]) : int(ends[line])].tobytes()
+                keep[line] = bool(raw.decode("utf-8", errors="replace").strip())
+            first = last
+        starts, ends = starts[keep], ends[keep]
+    return np.stack((starts, ends), axis=1).astype(np.uint64)
+
+
+def _load_persisted(path: Path, skip_empty: bool, stat: os.stat_result) -> np.ndarray | None:
+    index_path, meta_path = _index_paths(path, skip_empty)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if (
+            meta.get("version") != _INDEX_VERSION
+            or meta.get("size") != stat.st_size
+            or meta.get("mtime_ns") != stat.st_mtime_ns
+        ):
+            return None
+        index = np.load(index_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if index.ndim != 2 or index.shape[1] != 2 or index.shape[0] != meta.get("lines"):
+        return None
+    return index
+
+
+def _persist(path: Path, skip_empty: bool, stat: os.stat_result, index: np.ndarray) -> None:
+    index_path, meta_path = _index_paths(path, skip_empty)
+    meta = {
+        "version": _INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "lines": int(index.shape[0]),
+    }
+    partial = index_path.with_name(index_path.name + ".tmp")
+    try:
+        with partial.open("wb") as handle:
+            np.save(handle, index)
+        os.replace(partial, index_path)
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    except OSError as exc:
+        print(f"[PromptQueueFromFile] Could not save line index next to {path}: {exc}")
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+
+
+def open_corpus(path: str | Path, skip_empty: bool) -> tuple[_Corpus, tuple]:
+    """Map ``path`` and return it with its line index and a change-detection key."""
+    path = Path(str(path)).expanduser()
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns, bool(skip_empty))
+    with _CORPORA_LOCK:
+        corpus = _CORPORA.get(key)
+        if corpus is not None:
+            _CORPORA.move_to_end(key)
+            return corpus, key
+
+    mapping = None
+    if stat.st_size:
+        with path.open("rb") as handle:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    index = _load_persisted(path, skip_empty, stat)
+    if index is None:
+        if mapping is None:
+            index = np.zeros((0, 2), dtype=np.uint64)
+        else:
+            index = build_line_index(np.frombuffer(mapping, dtype=np.uint8), skip_empty)
+            print(f"[PromptQueueFromFile] Indexed {index.shape[0]} lines in {path.name}")
+            _persist(path, skip_empty, stat, index)
+
+    corpus = _Corpus(mapping, index)
+    with _CORPORA_LOCK:
+        _CORPORA[key] = corpus
+        # Evicted maps close once the last in-flight reader drops them.
+        while len(_CORPORA) > _MAX_OPEN_CORPORA:
+            _CORPORA.popitem(last=False)
+    return corpus, key
+
+
+def _round_value(seed: int, round_index: int, value: int, mask: int) -> int:
+    digest = hashlib.blake2b(
+        f"{seed}:{round_index}:{value}".encode("ascii"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "little") & mask
+
+
+def shuffled_position(position: int, count: int, seed: int) -> int:
+    """Map ``position`` through a seeded permutation of ``range(count)``.
+
+    A balanced Feistel network permutes the next power-of-four domain and
+    cycle-walking folds it back into ``range(count)``, so no permutation table
+    is ever materialized.
+    """
+    if count <= 1:
+        return 0
+    half_bits = max(1, ((count - 1).bit_length() + 1) // 2)
+    mask = (1 << half_bits) - 1
+    value = position
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_index in range(_FEISTEL_ROUNDS):
+            left, right = right, left ^ _round_value(seed, round_index, right, mask)
+        value = (left << half_bits) | right
+        if value < count:
+            return value
+
+
+def _new_state() -> dict:
+    return {"index": 0, "config": None, "reset_trigger": None}
+
+
+class PromptQueueFromFile(io.ComfyNode):
+    @classmethod
+    def define_schema(cls) -> io.Schema:
+        return io.Schema(
+            node_id="PromptQueueFromFile",
+            display_name="Prompt Queue (From File)",
+            category=TEXT,
+            description="Streams one line per execution from a large text or JSONL file without loading it.",
+            inputs=[
+                io.String.Input("file_path", default="C:/Prompts/prompts.txt", multiline=False),
+                io.Combo.Input("on_end", options=["empty", "repeat_last", "loop"], default="empty", optional=True),
+                io.Boolean.Input("strip_lines", default=True, optional=True),
+                io.Boolean.Input("skip_empty_lines", default=True, optional=True),
+                io.Combo.Input("order", options=["sequential", "shuffle"], default="sequential", optional=True),
+                io.Int.Input("seed", default=0, min=0, max=2**31 - 1, optional=True),
+                io.Int.Input("reset_trigger", default=0, min=0, max=2**31 - 1, optional=True),
+            ],
+            outputs=[
+                io.String.Output(display_name="text"),
+                io.Int.Output(display_name="line_index"),
+            ],
+            hidden=[io.Hidden.unique_id],
+            not_idempotent=True,
+        )
+
+    @classmethod
+    def fingerprint_inputs(cls, **kwargs):
+        return float("nan")
+
+    @classmethod
+    def execute(
+        cls,
+        file_path,
+        on_end="empty",
+        strip_lines=True,
+        skip_empty_lines=True,
+        order="sequential",
+        seed=0,
+        reset_trigger=0,
+    ) -> io.NodeOutput:
+        node_id = getattr(cls.hidden, "unique_id", "unknown")
+        try:
+            corpus, corpus_key = open_corpus(str(file_path), bool(skip_empty_lines))
+        except OSError as exc:
+            print(f"[PromptQueueFromFile] Cannot open {file_path}: {exc}")
+            return io.NodeOutput("", -1)
+        shuffle = order == "shuffle"
+
+        def next_position(state: dict) -> int | None:
+            config = (*corpus_key, shuffle, int(seed) if shuffle else 0)
+            if state["config"] != config or state["reset_trigger"] != int(reset_trigger):
+                state["index"] = 0
+                state["config"] = config
+                state["reset_trigger"] = int(reset_trigger)
+
+            count = len(corpus)
+            if not count:
+                return None
+            index = state["index"]
+            if index >= count:
+                if on_end == "loop":
+                    index %= count
+                elif on_end == "repeat_last":
+                    index = count - 1
+                else:
+                    return None
+
+            next_index = state["index"] + 1
+            if next_index >= count:
+                state["index"] = 0 if on_end == "loop" else count
+            else:
+                state["index"] = next_index
+            return index
+
+        position = with_queue_state("prompt_file", node_id, _new_state, next_position)
+        if position is None:
+            return io.NodeOutput("", -1)
+        # Reading happens outside the state lock; only the cursor is shared.
+        line_number = shuffled_position(position, len(corpus), int(seed)) if shuffle else position
+        return io.NodeOutput(corpus.line(line_number, bool(strip_lines)), int(line_number))
+
+
+__all__ = [
+    "PromptQueueFromFile",
+    "build_line_index",
+    "open_corpus",
+    "shuffled_position",
+]
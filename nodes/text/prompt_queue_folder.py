@@ -1,12 +1,43 @@
 """Folder-backed prompt queue for ComfyUI V3."""
 
+import bisect
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+import folder_paths
 from comfy_api.latest import io
 from ..categories import TEXT
 
 from ...runtime_state import with_queue_state
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional; the polling thread covers its absence.
+    FileSystemEventHandler = object
+    Observer = None
+
+
+_POLL_INTERVAL_SECONDS = 2.0
+_FULL_RESCAN_SECONDS = 60.0
+_IDLE_FOLDER_SECONDS = 600.0
+_MAX_CACHED_FOLDERS = 32
+_PREFETCH_AHEAD = 2
+_PREFETCH_BUFFER = 16
+# watchdog event types that can change a folder snapshot.
+_CHANGE_EVENTS = frozenset({"created", "deleted", "moved", "modified", "closed"})
+_RECORD_CACHE_BYTES = 64 * 1024 * 1024
+_JSONL_SUFFIXES = (".jsonl", ".ndjson")
+_CLAIMS_FILENAME = "flow_assistor_claims.sqlite3"
+_CLAIMS_TIMEOUT_SECONDS = 30.0
+
 
 def normalize_extensions(extensions: str) -> tuple[str, ...]:
     values = tuple(
@@ -43,8 +74,471 @@ def snapshot_files(paths: list[Path]) -> list[tuple[str, int, int]]:
     return snapshot
 
 
+def snapshot_digest(snapshot: list[tuple[str, int, int]]) -> str:
+    digest = hashlib.sha256()
+    for path, mtime_ns, size in snapshot:
+        digest.update(f"{path}\0{mtime_ns}\0{size}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class _FolderScan:
+    __slots__ = ("folder", "extensions", "snapshot", "digest", "dir_mtime_ns", "scanned_at", "used_at", "dirty", "observer")
+
+    def __init__(self, folder: str, extensions: str) -> None:
+        self.folder = folder
+        self.extensions = extensions
+        self.snapshot: list[tuple[str, int, int]] = []
+        self.digest = ""
+        self.dir_mtime_ns: int | None = None
+        self.scanned_at = 0.0
+        self.used_at = 0.0
+        self.dirty = True
+        self.observer = None
+
+
+class _DirtyOnChange(FileSystemEventHandler):
+    def __init__(self, entry: _FolderScan) -> None:
+        super().__init__()
+        self.entry = entry
+
+    def on_any_event(self, event) -> None:
+        # "opened" and "closed_no_write" come from reads, including this
+        # node's own reads and prefetches; they never change the listing.
+        if getattr(event, "event_type", None) in _CHANGE_EVENTS:
+            self.entry.dirty = True
+
+
+def _dir_mtime_ns(folder: str) -> int | None:
+    try:
+        return Path(folder).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class _ScanCache:
+    """Per-folder scan results revalidated off the execution path.
+
+    With ``watchdog`` installed, filesystem events mark a folder dirty. Without
+    it, a daemon thread checks each folder's mtime every few seconds and
+    re-snapshots file sizes and mtimes in the background once a minute, which
+    also catches in-place edits that do not touch the folder mtime. Either
+    way, a steady-state execution reads the cached snapshot with no directory
+    I/O at all.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, tuple[str, ...]], _FolderScan] = OrderedDict()
+        self._poller: threading.Thread | None = None
+
+    def get(self, folder_path: str, extensions: str) -> tuple[list[tuple[str, int, int]], str]:
+        folder = str(Path(str(folder_path)).expanduser())
+        key = (folder, normalize_extensions(str(extensions)))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _FolderScan(folder, str(extensions))
+                self._entries[key] = entry
+                self._evict_locked()
+            self._entries.move_to_end(key)
+            entry.used_at = now
+            if not entry.dirty and entry.scanned_at:
+                return entry.snapshot, entry.digest
+            # Events that arrive while scanning set the flag again.
+            entry.dirty = False
+        self._rescan(entry)
+        self._watch(entry)
+        return entry.snapshot, entry.digest
+
+    def _rescan(self, entry: _FolderScan) -> None:
+        dir_mtime_ns = _dir_mtime_ns(entry.folder)
+        snapshot = snapshot_files(get_files(entry.folder, entry.extensions))
+        digest = snapshot_digest(snapshot)
+        with self._lock:
+            entry.snapshot, entry.digest = snapshot, digest
+            entry.dir_mtime_ns = dir_mtime_ns
+            entry.scanned_at = time.monotonic()
+
+    def _watch(self, entry: _FolderScan) -> None:
+        if Observer is not None and entry.observer is None and entry.dir_mtime_ns is not None:
+            try:
+                observer = Observer()
+                observer.daemon = True
+                observer.schedule(_DirtyOnChange(entry), entry.folder, recursive=False)
+                observer.start()
+                entry.observer = observer
+            except Exception as exc:
+                print(f"[PromptQueueFromFolder] File watching unavailable, polling instead: {exc}")
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll,
+                    name="FlowAssistorFolderPoller",
+                    daemon=True,
+                )
+                self._poller.start()
+
+    def _evict_locked(self) -> None:
+        while len(self._entries) > _MAX_CACHED_FOLDERS:
+            _key, entry = self._entries.popitem(last=False)
+            self._stop(entry)
+
+    @staticmethod
+    def _stop(entry: _FolderScan) -> None:
+        if entry.observer is not None:
+            try:
+                entry.observer.stop()
+            except Exception:
+                pass
+            entry.observer = None
+
+    def _poll(self) -> None:
+        while True:
+            time.sleep(_POLL_INTERVAL_SECONDS)
+            now = time.monotonic()
+            with self._lock:
+                entries = list(self._entries.items())
+            for key, entry in entries:
+                if now - entry.used_at > _IDLE_FOLDER_SECONDS:
+                    with self._lock:
+                        if self._entries.get(key) is entry:
+                            del self._entries[key]
+                    self._stop(entry)
+                    continue
+                if entry.dirty:
+                    continue
+                if entry.observer is not None and entry.observer.is_alive():
+                    continue
+                if _dir_mtime_ns(entry.folder) != entry.dir_mtime_ns:
+                    entry.dirty = True
+                elif now - entry.scanned_at > _FULL_RESCAN_SECONDS:
+                    previous = entry.digest
+                    self._rescan(entry)
+                    if entry.digest != previous:
+                        print(f"[PromptQueueFromFolder] Files changed in {entry.folder}")
+
+
+_SCANS = _ScanCache()
+
+
+def _read_prompt(path: str) -> str:
+    try:
+        return Path(path).read_text(encoding="utf-8")
+    except Exception as exc:
+        print(f"[PromptQueueFromFolder] Error reading {Path(path).name}: {exc}")
+        return f"Error reading file: {exc}"
+
+
+def _file_version(path: str) -> tuple[int, int] | None:
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_versioned(path: str) -> tuple[tuple[int, int] | None, str]:
+    version = _file_version(path)
+    return version, _read_prompt(path)
+
+
+class _Prefetcher:
+    """Bounded read-ahead buffer of prompt file contents.
+
+    Entries are keyed by the snapshot tuple ``(path, mtime_ns, size)``. The
+    snapshot can trail in-place edits until the next rescan, so each buffered
+    read also records the file's mtime and size, and ``read`` re-reads the
+    file when they no longer match.
+    """
+
+    def __init__(self, workers: int = _PREFETCH_AHEAD, capacity: int = _PREFETCH_BUFFER) -> None:
+        self._lock = threading.Lock()
+        self._pending: OrderedDict[tuple[str, int, int], Future] = OrderedDict()
+        self._capacity = max(1, int(capacity))
+        self._workers = max(1, int(workers))
+        self._executor: ThreadPoolExecutor | None = None
+
+    def read(self, entry: tuple[str, int, int]) -> str:
+        with self._lock:
+            future = self._pending.pop(entry, None)
+        if future is not None and not future.cancelled():
+            version, content = future.result()
+            if version is not None and version == _file_version(entry[0]):
+                return content
+        return _read_prompt(entry[0])
+
+    def _executor_locked(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers,
+                thread_name_prefix="FlowAssistorPrefetch",
+            )
+        return self._executor
+
+    def submit(self, function, *args) -> Future:
+        with self._lock:
+            return self._executor_locked().submit(function, *args)
+
+    def schedule(self, entries: list[tuple[str, int, int]]) -> None:
+        with self._lock:
+            executor = self._executor_locked()
+            for entry in entries:
+                if entry in self._pending:
+                    self._pending.move_to_end(entry)
+                    continue
+                self._pending[entry] = executor.submit(_read_versioned, entry[0])
+            while len(self._pending) > self._capacity:
+                _entry, future = self._pending.popitem(last=False)
+                future.cancel()
+
+
+_PREFETCH = _Prefetcher()
+
+
+def parse_records(path: str) -> list | None:
+    """Parse one prompt file into queue records, or ``None`` if it is unreadable.
+
+    JSONL files yield one record per non-empty line and a top-level JSON array
+    yields one record per element. Any other file, including JSON that fails
+    to parse, is a single record holding its raw text.
+    """
+    name = Path(path).name
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except Exception as exc:
+        print(f"[PromptQueueFromFolder] Error reading {name}: {exc}")
+        return None
+
+    suffix = Path(path).suffix.lower()
+    if suffix in _JSONL_SUFFIXES:
+        records = []
+        invalid = 0
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                invalid += 1
+        if invalid:
+            print(f"[PromptQueueFromFolder] Skipped {invalid} invalid JSONL lines in {name}")
+        return records
+    if suffix == ".json":
+        try:
+            value = json.loads(text)
+        except ValueError as exc:
+            print(f"[PromptQueueFromFolder] Invalid JSON in {name}, using raw text: {exc}")
+            return [text]
+        return value if isinstance(value, list) else [value]
+    return [text]
+
+
+def record_fields(record, prompt_field: str, negative_field: str, seed_field: str) -> tuple[str, str, int]:
+    """Return ``(prompt, negative, seed)`` for one parsed record."""
+    negative = seed = None
+    if isinstance(record, dict):
+        prompt = record.get(prompt_field)
+        if prompt is None:
+            prompt = record
+        negative = record.get(negative_field)
+        seed = record.get(seed_field)
+    else:
+        prompt = record
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, ensure_ascii=False)
+    if negative is not None and not isinstance(negative, str):
+        negative = json.dumps(negative, ensure_ascii=False)
+    try:
+        seed = int(seed) if seed is not None else 0
+    except (TypeError, ValueError):
+        seed = 0
+    return prompt, negative or "", seed
+
+
+class _RecordCache:
+    """Parsed records keyed by the snapshot tuple ``(path, mtime_ns, size)``.
+
+    Files are parsed on first use, so a large folder costs nothing up front.
+    An edited file gets a new key once the folder snapshot picks up the
+    change. The cache is bounded by the source size of the files it holds.
+    """
+
+    def __init__(self, max_bytes: int = _RECORD_CACHE_BYTES) -> None:
+        self._lock = threading.Lock()
+        self._records: OrderedDict[tuple[str, int, int], list] = OrderedDict()
+        self._loading: set[tuple[str, int, int]] = set()
+        self._bytes = 0
+        self._max_bytes = max(1, int(max_bytes))
+
+    def peek(self, entry: tuple[str, int, int]) -> list | None:
+        """Return cached records without parsing."""
+        with self._lock:
+            records = self._records.get(entry)
+            if records is not None:
+                self._records.move_to_end(entry)
+            return records
+
+    def get(self, entry: tuple[str, int, int]) -> list:
+        with self._lock:
+            records = self._records.get(entry)
+            if records is not None:
+                self._records.move_to_end(entry)
+                return records
+        records = parse_records(entry[0])
+        if records is None:
+            # Read errors are not cached; the next execution tries again.
+            return [f"Error reading file: {Path(entry[0]).name}"]
+        with self._lock:
+            if entry not in self._records:
+                self._records[entry] = records
+                self._bytes += entry[2]
+                while self._bytes > self._max_bytes and len(self._records) > 1:
+                    stale, _records = self._records.popitem(last=False)
+                    self._bytes -= stale[2]
+        return records
+
+    def warm(self, entries: list[tuple[str, int, int]]) -> None:
+        with self._lock:
+            missing = [
+                entry
+                for entry in entries
+                if entry not in self._records and entry not in self._loading
+            ]
+            self._loading.update(missing)
+        for entry in missing:
+            _PREFETCH.submit(self._load, entry)
+
+    def _load(self, entry: tuple[str, int, int]) -> None:
+        try:
+            self.get(entry)
+        finally:
+            with self._lock:
+                self._loading.discard(entry)
+
+
+_RECORDS = _RecordCache()
+
+
+class _RecordsMissing(Exception):
+    """Raised under a lock when a file must be parsed before continuing."""
+
+    def __init__(self, entry: tuple[str, int, int]) -> None:
+        super().__init__(entry[0])
+        self.entry = entry
+
+
+def _next_after(files: list, cursor: tuple[str, int] | None, record_count) -> tuple[int, int] | None:
+    """Return the ``(file, record)`` position following a named cursor.
+
+    The cursor names a file instead of indexing it, so workers whose folder
+    snapshots differ for a moment still agree on what comes next.
+    """
+    names = [Path(entry[0]).name for entry in files]
+    start = 0
+    if cursor is not None:
+        filename, record = cursor
+        start = bisect.bisect_left(names, filename)
+        if start < len(names) and names[start] == filename:
+            if record + 1 < record_count(files[start]):
+                return start, record + 1
+            start += 1
+    for index in range(start, len(files)):
+        if record_count(files[index]):
+            return index, 0
+    return None
+
+
+def _last_record(files: list, record_count) -> tuple[int, int] | None:
+    for index in range(len(files) - 1, -1, -1):
+        total = record_count(files[index])
+        if total:
+            return index, total - 1
+    return None
+
+
+def _claims_path() -> Path:
+    configured = os.environ.get("FLOW_ASSISTOR_CLAIMS_PATH")
+    if configured:
+        return Path(configured).expanduser()
+    return Path(folder_paths.get_user_directory()) / _CLAIMS_FILENAME
+
+
+class _ClaimStore:
+    """Queue cursors shared by every ComfyUI process on this machine.
+
+    Cursors live in a small SQLite table in the ComfyUI user directory, not in
+    the prompt folder, which may be on a network drive. Each claim advances a
+    cursor in a ``BEGIN IMMEDIATE`` transaction, so concurrent workers never
+    receive the same item.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._connections: dict[Path, sqlite3.Connection] = {}
+
+    def _connect_locked(self) -> sqlite3.Connection:
+        path = _claims_path()
+        connection = self._connections.get(path)
+        if connection is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                str(path),
+                timeout=_CLAIMS_TIMEOUT_SECONDS,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cursors ("
+                "queue TEXT PRIMARY KEY, filename TEXT, record INTEGER NOT NULL, "
+                "reset_trigger INTEGER, updated REAL NOT NULL)"
+            )
+            self._connections[path] = connection
+        return connection
+
+    def claim(self, queue: str, reset_trigger: int, advance):
+        """Run ``advance(cursor) -> (result, new_cursor)`` atomically across processes."""
+        with self._lock:
+            connection = self._connect_locked()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT filename, record, reset_trigger FROM cursors WHERE queue = ?",
+                    (queue,),
+                ).fetchone()
+                cursor = None
+                if row is not None and row[0] is not None and row[2] == reset_trigger:
+                    cursor = (row[0], int(row[1]))
+                result, new_cursor = advance(cursor)
+                if new_cursor is not None:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO cursors(queue, filename, record, reset_trigger, updated) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (queue, new_cursor[0], new_cursor[1], reset_trigger, time.time()),
+                    )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+            return result
+
+
+_CLAIMS = _ClaimStore()
+
+
 def _new_state() -> dict:
-    return {"index": 0, "files": [], "config": None, "reset_trigger": None}
+    # "_files" mirrors the current scan; only its digest and the position are
+    # persisted by runtime_state. "record" is the position inside a parsed
+    # multi-record file.
+    return {
+        "index": 0,
+        "record": 0,
+        "_files": [],
+        "files_digest": None,
+        "config": None,
+        "reset_trigger": None,
+    }
 
 
 class PromptQueueFromFolder(io.ComfyNode):
@@ -59,10 +553,24 @@ class PromptQueueFromFolder(io.ComfyNode):
                 io.String.Input("extensions", default="txt, json", optional=True),
                 io.Combo.Input("on_end", options=["empty", "loop", "hold_last"], default="empty", optional=True),
                 io.Int.Input("reset_trigger", default=0, min=0, max=2**31 - 1, optional=True),
+                io.Boolean.Input("parse_json", default=False, optional=True),
+                io.String.Input("prompt_field", default="prompt", optional=True),
+                io.String.Input("negative_field", default="negative", optional=True),
+                io.String.Input("seed_field", default="seed", optional=True),
+                io.Boolean.Input("shared_claims", default=False, optional=True),
+                io.String.Input(
+                    "claim_queue",
+                    default="",
+                    optional=True,
+                    tooltip="With shared_claims, nodes with the same name split one queue. "
+                    "Empty keeps a separate queue per node id.",
+                ),
             ],
             outputs=[
                 io.String.Output(display_name="prompt_text"),
                 io.String.Output(display_name="filename"),
+                io.String.Output(display_name="negative"),
+                io.Int.Output(display_name="seed"),
             ],
             hidden=[io.Hidden.unique_id],
             not_idempotent=True,
@@ -79,57 +587,171 @@ class PromptQueueFromFolder(io.ComfyNode):
         extensions="txt, json",
         on_end="empty",
         reset_trigger=0,
+        parse_json=False,
+        prompt_field="prompt",
+        negative_field="negative",
+        seed_field="seed",
+        shared_claims=False,
+        claim_queue="",
     ) -> io.NodeOutput:
         node_id = getattr(cls.hidden, "unique_id", "unknown")
-        current_files = get_files(str(folder_path), str(extensions))
-        snapshot = snapshot_files(current_files)
+        snapshot, digest = _SCANS.get(str(folder_path), str(extensions))
+        parse = bool(parse_json)
+        config = (
+            str(Path(str(folder_path)).expanduser()),
+            normalize_extensions(str(extensions)),
+            parse,
+        )
 
-        def next_value(state: dict) -> tuple[str, str]:
-            config = (str(Path(str(folder_path)).expanduser()), normalize_extensions(str(extensions)))
+        def sync(state: dict) -> list:
             reset_changed = state["reset_trigger"] != int(reset_trigger)
-            files_changed = state["files"] != snapshot
+            files_changed = state["files_digest"] != digest
+            state["_files"] = snapshot
             if state["config"] != config or reset_changed or files_changed:
-                state["files"] = snapshot
+                state["files_digest"] = digest
                 state["index"] = 0
+                state["record"] = 0
                 state["config"] = config
                 state["reset_trigger"] = int(reset_trigger)
                 print(f"[PromptQueueFromFolder] Folder scanned: {len(snapshot)} files found")
+            return state["_files"]
+
+        # Files parsed outside the locks during this execution. Keeping them
+        # here means a cache eviction or read error cannot stall the retries.
+        parsed: dict[tuple[str, int, int], list] = {}
+
+        def record_count(entry: tuple[str, int, int]) -> int:
+            if not parse:
+                return 1
+            records = parsed.get(entry)
+            if records is None:
+                records = _RECORDS.peek(entry)
+            if records is None:
+                raise _RecordsMissing(entry)
+            return len(records)
 
-            if not state["files"]:
-                return "", "no_files_found"
+        def without_parsing_under_lock(run):
+            # Cursor updates only see parsed files. A miss aborts the attempt
+            # before the cursor moves, the file is parsed with no lock held,
+            # and the update is retried.
+            while True:
+                try:
+                    return run()
+                except _RecordsMissing as missing:
+                    parsed[missing.entry] = _RECORDS.get(missing.entry)
+
+        def next_entry(state: dict) -> tuple[tuple[str, int, int] | None, int, str, list]:
+            files = sync(state)
+            if not files:
+                return None, 0, "no_files_found", []
+
+            count = len(files)
+            index, record = state["index"], state.get("record", 0)
+            # Skip files without records; one lap at most, even when looping.
+            for _ in range(count + 1):
+                if index >= count:
+                    if on_end != "loop":
+                        break
+                    index, record = 0, 0
+                if record < record_count(files[index]):
+                    break
+                index, record = index + 1, 0
+            else:
+                return None, 0, "end_of_list", []
 
-            count = len(state["files"])
-            index = state["index"]
             if index >= count:
-                if on_end == "loop":
-                    index = 0
-                    state["index"] = 0
-                elif on_end == "hold_last":
-                    index = count - 1
-                else:
-                    return "", "end_of_list"
+                if on_end != "hold_last":
+                    state["index"], state["record"] = count, 0
+                    return None, 0, "end_of_list", []
+                # Hold on the last available record; the cursor stays at the end.
+                held = _last_record(files, record_count)
+                state["index"], state["record"] = count, 0
+                if held is None:
+                    return None, 0, "end_of_list", []
+                return files[held[0]], held[1], Path(files[held[0]][0]).name, []
 
-            path = Path(state["files"][index][0])
-            try:
-                content = path.read_text(encoding="utf-8")
-            except Exception as exc:
-                content = f"Error reading file: {exc}"
-                print(f"[PromptQueueFromFolder] Error reading {path.name}: {exc}")
+            state["index"], state["record"] = index, record + 1
+            if state["record"] >= record_count(files[index]):
+                state["index"], state["record"] = index + 1, 0
+                if state["index"] >= count and on_end == "loop":
+                    state["index"] = 0
 
-            next_index = state["index"] + 1
-            if next_index >= count:
+            upcoming = []
+            for offset in range(_PREFETCH_AHEAD):
+                ahead = state["index"] + offset
                 if on_end == "loop":
-                    state["index"] = 0
-                elif on_end == "hold_last":
-                    state["index"] = count - 1
-                else:
-                    state["index"] = count
+                    ahead %= count
+                elif ahead >= count:
+                    break
+                upcoming.append(files[ahead])
+            return files[index], record, Path(files[index][0]).name, upcoming
+
+        def emit(entry: tuple[str, int, int], record: int, filename: str, upcoming: list) -> io.NodeOutput:
+            if not parse:
+                content = _PREFETCH.read(entry)
+                if upcoming:
+                    _PREFETCH.schedule(upcoming)
+                return io.NodeOutput(content, filename, "", 0)
+
+            records = parsed.get(entry)
+            if records is None:
+                records = _RECORDS.get(entry)
+            if upcoming:
+                _RECORDS.warm(upcoming)
+            if record >= len(records):
+                # The file changed between the cursor update and this read.
+                return io.NodeOutput("", filename, "", 0)
+            prompt, negative, seed = record_fields(
+                records[record], str(prompt_field), str(negative_field), str(seed_field)
+            )
+            return io.NodeOutput(prompt, filename, negative, seed)
+
+        if bool(shared_claims) and snapshot:
+            # Workers running the same workflow share node ids, so they split
+            # one queue; other nodes on the folder only join it by name.
+            name = str(claim_queue or "").strip()
+            owner = f"name:{name}" if name else f"node:{node_id}"
+            queue = "|".join((owner, config[0], ",".join(config[1]), "records" if parse else "files"))
+            trigger = int(reset_trigger)
+
+            def claim_next(cursor: tuple[str, int] | None) -> tuple[tuple[int, int] | None, tuple[str, int] | None]:
+                position = _next_after(snapshot, cursor, record_count)
+                if position is None and on_end == "loop":
+                    position = _next_after(snapshot, None, record_count)
+                if position is None:
+                    held = _last_record(snapshot, record_count) if on_end == "hold_last" else None
+                    return held, None
+                return position, (Path(snapshot[position[0]][0]).name, position[1])
+
+            try:
+                position = without_parsing_under_lock(
+                    lambda: _CLAIMS.claim(queue, trigger, claim_next)
+                )
+            except sqlite3.Error as exc:
+                print(f"[PromptQueueFromFolder] Shared claims unavailable, using this worker's cursor: {exc}")
             else:
-                state["index"] = next_index
-            return content, path.name
+                if position is None:
+                    return io.NodeOutput("", "end_of_list", "", 0)
+                entry = snapshot[position[0]]
+                # No read-ahead: other workers are likely to claim the next items.
+                return emit(entry, position[1], Path(entry[0]).name, [])
 
-        content, filename = with_queue_state("folder_prompt", node_id, _new_state, next_value)
-        return io.NodeOutput(content, filename)
+        # Only the cursor update runs under the runtime-state lock; file reads
+        # happen afterwards, mostly from the read-ahead buffer.
+        entry, record, filename, upcoming = without_parsing_under_lock(
+            lambda: with_queue_state("folder_prompt", node_id, _new_state, next_entry)
+        )
+        if entry is None:
+            return io.NodeOutput("", filename, "", 0)
+        return emit(entry, record, filename, upcoming)
 
 
-__all__ = ["PromptQueueFromFolder", "get_files", "normalize_extensions", "snapshot_files"]
+__all__ = [
+    "PromptQueueFromFolder",
+    "get_files",
+    "normalize_extensions",
+    "parse_records",
+    "record_fields",
+    "snapshot_digest",
+    "snapshot_files",
+]
@@ -7,13 +7,15 @@ from typing import Any, Callable
 from server import PromptServer
 
 from .nodes.loaders.lora_online import open_lora_folder_handler
-from .nodes.image.visual_marquee import submit_crop_handler
+from .nodes.image.visual_marquee import marquee_frame_handler, submit_crop_handler
 
 
 _ROUTES: tuple[tuple[str, str, Callable[..., Any]], ...] = (
     ("POST", "/flow_assistor/open_lora_folder", open_lora_folder_handler),
     ("POST", "/flow_assistor/submit_crop", submit_crop_handler),
     ("POST", "/api/flow_assistor/submit_crop", submit_crop_handler),
+    ("GET", "/flow_assistor/marquee_frame", marquee_frame_handler),
+    ("GET", "/api/flow_assistor/marquee_frame", marquee_frame_handler),
 )
 _REGISTERED = False
 
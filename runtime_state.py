@@ -3,20 +3,231 @@
 ComfyUI V3 sanitizes node classes and does not expose persistent node instances.
 State that must survive between executions is therefore stored here and keyed by
 ComfyUI's hidden unique node id.
+
+States live in memory. An optional SQLite backend mirrors them to disk with a
+write-behind thread so queue positions survive a ComfyUI restart without adding
+disk latency to node execution. State keys starting with ``_`` are treated as
+rebuildable caches and are never persisted.
 """
 
 from __future__ import annotations
 
+import atexit
+import json
+import sqlite3
 import threading
 import time
+from collections import OrderedDict
 from collections.abc import Callable
+from pathlib import Path
 from typing import Any
 
 
 _MAX_STATES = 2048
 _MAX_IDLE_SECONDS = 24 * 60 * 60
-_LOCK = threading.RLock()
-_QUEUE_STATES: dict[tuple[str, str], dict[str, Any]] = {}
+# Keys are spread over independently locked shards so unrelated nodes never
+# wait on each other. Each shard keeps its states in access order, which makes
+# both LRU eviction and idle expiry O(1) amortized per call.
+_SHARD_COUNT = 16
+_FLUSH_INTERVAL_SECONDS = 1.0
+
+StateKey = tuple[str, str]
+
+
+class _Shard:
+    __slots__ = ("lock", "states")
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.states: OrderedDict[StateKey, dict[str, Any]] = OrderedDict()
+
+
+_SHARDS = tuple(_Shard() for _ in range(_SHARD_COUNT))
+# Total states across all shards. ``_MAX_STATES`` applies to this count, so
+# how keys happen to hash never decides what is evicted. Only ever taken
+# briefly, and never while waiting for a shard lock.
+_STATE_COUNT = 0
+_COUNT_LOCK = threading.Lock()
+
+
+def _add_to_count(delta: int) -> None:
+    global _STATE_COUNT
+    with _COUNT_LOCK:
+        _STATE_COUNT += delta
+
+
+def _encode(value: Any) -> Any:
+    # JSON has no tuples, but node states compare tuple configs with ``!=``;
+    # tag them so a restored state compares equal to the live configuration.
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"{type(value).__name__} is not persistable")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if set(value) == {"__tuple__"}:
+            return tuple(_decode(item) for item in value["__tuple__"])
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+
+def _serialize_state(state: dict[str, Any]) -> str:
+    persistent = {
+        key: value
+        for key, value in state.items()
+        if not key.startswith("_") and key != "last_access"
+    }
+    return json.dumps(_encode(persistent), separators=(",", ":"))
+
+
+class _MemoryBackend:
+    """Default backend: states exist only for the life of the process."""
+
+    persistent = False
+
+    def load(self) -> dict[StateKey, dict[str, Any]]:
+        return {}
+
+    def save(self, key: StateKey, state: dict[str, Any]) -> None:
+        del key, state
+
+    def delete(self, key: StateKey) -> None:
+        del key
+
+    def clear(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _SQLiteBackend:
+    """Write-behind SQLite mirror of the in-memory states.
+
+    ``save`` only records the latest serialized state per key. A daemon thread
+    writes pending changes in one transaction per interval, so many executions
+    share a single commit and fsync.
+    """
+
+    persistent = True
+
+    def __init__(self, path: Path, flush_interval: float = _FLUSH_INTERVAL_SECONDS) -> None:
+        self.path = Path(path)
+        self.flush_interval = float(flush_interval)
+        self._pending: dict[StateKey, str | None] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS queue_state ("
+            "namespace TEXT NOT NULL, node_id TEXT NOT NULL, state TEXT NOT NULL, "
+            "updated REAL NOT NULL, PRIMARY KEY (namespace, node_id))"
+        )
+        self._connection.commit()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="FlowAssistorStateWriter",
+            daemon=True,
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def load(self) -> dict[StateKey, dict[str, Any]]:
+        cutoff = time.time() - _MAX_IDLE_SECONDS
+        rows = self._connection.execute(
+            "SELECT namespace, node_id, state FROM queue_state WHERE updated >= ?",
+            (cutoff,),
+        ).fetchall()
+        states: dict[StateKey, dict[str, Any]] = {}
+        for namespace, node_id, payload in rows:
+            try:
+                state = _decode(json.loads(payload))
+            except ValueError:
+                continue
+            if isinstance(state, dict):
+                states[(namespace, node_id)] = state
+        return states
+
+    def save(self, key: StateKey, state: dict[str, Any]) -> None:
+        try:
+            payload = _serialize_state(state)
+        except TypeError as exc:
+            print(f"[Flow Assistor] Runtime state for {key} was not persisted: {exc}")
+            return
+        with self._pending_lock:
+            self._pending[key] = payload
+
+    def delete(self, key: StateKey) -> None:
+        with self._pending_lock:
+            self._pending[key] = None
+
+    def clear(self) -> None:
+        with self._write_lock:
+            with self._pending_lock:
+                self._pending.clear()
+            self._connection.execute("DELETE FROM queue_state")
+            self._connection.commit()
+
+    def flush(self) -> None:
+        # Executions only ever wait on the brief pending-dict swap, never on
+        # the database write itself.
+        with self._write_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            now = time.time()
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO queue_state(namespace, node_id, state, updated) "
+                        "VALUES (?, ?, ?, ?)",
+                        [
+                            (key[0], key[1], payload, now)
+                            for key, payload in pending.items()
+                            if payload is not None
+                        ],
+                    )
+                    self._connection.executemany(
+                        "DELETE FROM queue_state WHERE namespace = ? AND node_id = ?",
+                        [key for key, payload in pending.items() if payload is None],
+                    )
+            except sqlite3.Error as exc:
+                print(f"[Flow Assistor] Could not persist runtime state: {exc}")
+                # Keep the batch for the next attempt unless newer data arrived.
+                with self._pending_lock:
+                    for key, payload in pending.items():
+                        self._pending.setdefault(key, payload)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        atexit.unregister(self.flush)
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._connection.close()
+
+
+_BACKEND: _MemoryBackend | _SQLiteBackend = _MemoryBackend()
 
 
 def normalize_node_id(value: Any) -> str:
@@ -27,22 +238,29 @@ def normalize_node_id(value: Any) -> str:
     return text or "unknown"
 
 
-def _cleanup_locked(now: float) -> None:
-    if len(_QUEUE_STATES) <= _MAX_STATES:
-        stale = [
-            key
-            for key, state in _QUEUE_STATES.items()
-            if now - float(state.get("last_access", now)) > _MAX_IDLE_SECONDS
-        ]
-    else:
-        ordered = sorted(
-            _QUEUE_STATES,
-            key=lambda key: float(_QUEUE_STATES[key].get("last_access", 0.0)),
-        )
-        stale = ordered[: max(1, len(_QUEUE_STATES) - _MAX_STATES)]
+def _shard_for(key: StateKey) -> _Shard:
+    return _SHARDS[hash(key) % _SHARD_COUNT]
+
 
-    for key in stale:
-        _QUEUE_STATES.pop(key, None)
+def _pop_oldest_locked(shard: _Shard) -> None:
+    key, _state = shard.states.popitem(last=False)
+    _add_to_count(-1)
+    _BACKEND.delete(key)
+
+
+def _cleanup_locked(shard: _Shard, now: float) -> None:
+    states = shard.states
+    # While over the global cap, the shard being written gives up its oldest
+    # states. Its newest state, the one just used, is always kept, so the
+    # total can briefly exceed the cap by at most one state per shard.
+    while len(states) > 1 and _STATE_COUNT > _MAX_STATES:
+        _pop_oldest_locked(shard)
+    # The oldest entry is first, so expiry stops at the first fresh state.
+    while states:
+        oldest = next(iter(states.values()))
+        if now - float(oldest.get("last_access", now)) <= _MAX_IDLE_SECONDS:
+            break
+        _pop_oldest_locked(shard)
 
 
 def with_queue_state(
@@ -53,22 +271,84 @@ def with_queue_state(
 ) -> Any:
     """Run an operation atomically against a node-specific mutable state."""
     key = (namespace, normalize_node_id(node_id))
+    shard = _shard_for(key)
     now = time.monotonic()
-    with _LOCK:
-        state = _QUEUE_STATES.get(key)
+    with shard.lock:
+        state = shard.states.get(key)
         if state is None:
             state = factory()
-            _QUEUE_STATES[key] = state
+            shard.states[key] = state
+            _add_to_count(1)
+        else:
+            shard.states.move_to_end(key)
         state["last_access"] = now
         result = operation(state)
-        _cleanup_locked(now)
+        if _BACKEND.persistent:
+            _BACKEND.save(key, state)
+        _cleanup_locked(shard, now)
         return result
 
 
 def clear_runtime_state() -> None:
     """Clear all state; intended for tests and explicit extension reloads."""
-    with _LOCK:
-        _QUEUE_STATES.clear()
+    for shard in _SHARDS:
+        with shard.lock:
+            _add_to_count(-len(shard.states))
+            shard.states.clear()
+    _BACKEND.clear()
+
+
+def configure_runtime_state(backend: str = "memory", path: str | Path | None = None) -> None:
+    """Select the state backend and reload any persisted states.
+
+    ``backend`` is ``"memory"`` (the default, nothing survives a restart) or
+    ``"sqlite"``, which requires ``path``. In-memory states are replaced by
+    whatever the new backend holds.
+    """
+    global _BACKEND
+
+    backend = str(backend).strip().lower() or "memory"
+    if backend == "sqlite":
+        if path is None:
+            raise ValueError("The sqlite runtime state backend requires a path.")
+        new_backend: _MemoryBackend | _SQLiteBackend = _SQLiteBackend(Path(path))
+    elif backend == "memory":
+        new_backend = _MemoryBackend()
+    else:
+        raise ValueError(f"Unknown runtime state backend {backend!r}; use 'memory' or 'sqlite'.")
+
+    old_backend, _BACKEND = _BACKEND, new_backend
+    old_backend.close()
+
+    restored = new_backend.load()
+    now = time.monotonic()
+    for shard in _SHARDS:
+        with shard.lock:
+            _add_to_count(-len(shard.states))
+            shard.states.clear()
+    for key, state in restored.items():
+        state["last_access"] = now
+        shard = _shard_for(key)
+        with shard.lock:
+            if key not in shard.states:
+                _add_to_count(1)
+            shard.states[key] = state
+            _cleanup_locked(shard, now)
+    if restored:
+        print(f"[Flow Assistor] Restored {len(restored)} runtime queue states.")
+
+
+def flush_runtime_state() -> None:
+    """Write pending persistent state immediately."""
+    flush = getattr(_BACKEND, "flush", None)
+    if callable(flush):
+        flush()
 
 
-__all__ = ["clear_runtime_state", "normalize_node_id", "with_queue_state"]
+__all__ = [
+    "clear_runtime_state",
+    "configure_runtime_state",
+    "flush_runtime_state",
+    "normalize_node_id",
+    "with_queue_state",
+]
@@ -25,7 +25,9 @@ app.registerExtension({
         data.max_resolution,
         Boolean(data.original_size),
         String(data.node_id),
-        String(data.token)
+        String(data.token),
+        { width: Number(data.source_width) || 0, height: Number(data.source_height) || 0 },
+        { count: Number(data.frame_count) || 1, previewSize: Number(data.preview_max_size) || 0 }
       );
     });
   },
@@ -38,7 +40,9 @@ app.registerExtension({
       maxRes,
       originalSizeMode,
       nodeId,
-      token
+      token,
+      sourceSize,
+      frameInfo
     ) {
       const elementId = `marquee_editor_${nodeId}`;
       let container = document.getElementById(elementId);
@@ -142,6 +146,54 @@ app.registerExtension({
 
       container.appendChild(toolbar);
 
+      // Frame strip: thumbnails are requested lazily from the server, so only
+      // frames scrolled into view are ever encoded.
+      const frameCount = Math.max(1, frameInfo?.count || 1);
+      const frameUrl = (index, size) =>
+        api.apiURL(
+          `/flow_assistor/marquee_frame?node_id=${encodeURIComponent(nodeId)}&token=${encodeURIComponent(
+            token
+          )}&index=${index}${size ? `&size=${size}` : ""}`
+        );
+      const frameBoxes = new Array(frameCount).fill(null);
+      let currentFrame = 0;
+      let selectFrame = null;
+      let highlightFrame = () => {};
+
+      if (frameCount > 1) {
+        const strip = document.createElement("div");
+        Object.assign(strip.style, {
+          display: "flex",
+          gap: "6px",
+          padding: "6px 10px",
+          overflowX: "auto",
+          background: "#2a2a2a",
+          borderBottom: "1px solid #444",
+          minHeight: "76px",
+        });
+        const thumbs = [];
+        for (let i = 0; i < frameCount; i++) {
+          const thumb = document.createElement("img");
+          thumb.loading = "lazy";
+          thumb.decoding = "async";
+          thumb.src = frameUrl(i, 128);
+          thumb.title = `Frame ${i}`;
+          Object.assign(thumb.style, {
+            height: "64px",
+            minWidth: "32px",
+            cursor: "pointer",
+            border: i === 0 ? "2px solid #00ff00" : "2px solid transparent",
+            borderRadius: "3px",
+          });
+          thumb.onclick = () => selectFrame && selectFrame(i);
+          thumbs.push(thumb);
+          strip.appendChild(thumb);
+        }
+        container.appendChild(strip);
+        highlightFrame = (index) =>
+          thumbs.forEach((t, i) => (t.style.border = i === index ? "2px solid #00ff00" : "2px solid transparent"));
+      }
+
       // Canvas wrapper
       const canvasWrap = document.createElement("div");
       Object.assign(canvasWrap.style, {
@@ -206,18 +258,23 @@ app.registerExtension({
       exitBtn.onclick = cancelAndClose;
 
       const imgEl = new Image();
+      let initialized = false;
       imgEl.onload = function () {
+        // Switching frames only swaps the pixels; the editor is built once.
+        if (initialized) return;
+        initialized = true;
         const maxDisplayW = Math.min(window.innerWidth * 0.85, 1200);
         const maxDisplayH = Math.min(window.innerHeight * 0.85, 900);
 
-        const scale = Math.min(
-          maxDisplayW / imgEl.naturalWidth,
-          maxDisplayH / imgEl.naturalHeight,
-          1.0
-        );
+        // The preview may be downsampled; the selection is kept in
+        // full-resolution source pixels so submitted crops need no rescaling.
+        const sourceW = sourceSize?.width || imgEl.naturalWidth;
+        const sourceH = sourceSize?.height || imgEl.naturalHeight;
 
-        const displayW = imgEl.naturalWidth * scale;
-        const displayH = imgEl.naturalHeight * scale;
+        const scale = Math.min(maxDisplayW / sourceW, maxDisplayH / sourceH, 1.0);
+
+        const displayW = sourceW * scale;
+        const displayH = sourceH * scale;
 
         imgEl.style.width = `${displayW}px`;
         imgEl.style.height = `${displayH}px`;
@@ -225,10 +282,10 @@ app.registerExtension({
         canvasWrap.appendChild(imgEl);
 
         // Selection box in REAL image coordinates
-        let startSize = Math.min(512, imgEl.naturalWidth, imgEl.naturalHeight);
+        let startSize = Math.min(512, sourceW, sourceH);
         let realBox = {
-          x: Math.floor((imgEl.naturalWidth - startSize) / 2),
-          y: Math.floor((imgEl.naturalHeight - startSize) / 2),
+          x: Math.floor((sourceW - startSize) / 2),
+          y: Math.floor((sourceH - startSize) / 2),
           w: startSize,
           h: startSize,
         };
@@ -265,13 +322,11 @@ app.registerExtension({
           if (realBox.x < 0) realBox.x = 0;
           if (realBox.y < 0) realBox.y = 0;
 
-          if (realBox.w > imgEl.naturalWidth) realBox.w = imgEl.naturalWidth;
-          if (realBox.h > imgEl.naturalHeight) realBox.h = imgEl.naturalHeight;
+          if (realBox.w > sourceW) realBox.w = sourceW;
+          if (realBox.h > sourceH) realBox.h = sourceH;
 
-          if (realBox.x + realBox.w > imgEl.naturalWidth)
-            realBox.x = imgEl.naturalWidth - realBox.w;
-          if (realBox.y + realBox.h > imgEl.naturalHeight)
-            realBox.y = imgEl.naturalHeight - realBox.h;
+          if (realBox.x + realBox.w > sourceW) realBox.x = sourceW - realBox.w;
+          if (realBox.y + realBox.h > sourceH) realBox.y = sourceH - realBox.h;
         }
 
         function updateUI() {
@@ -371,22 +426,42 @@ app.registerExtension({
         clampBox();
         updateUI();
 
+        // Each frame keeps its own box; a frame opened for the first time
+        // starts from the box of the frame it was reached from.
+        selectFrame = (index) => {
+          if (index === currentFrame) return;
+          frameBoxes[currentFrame] = { ...realBox };
+          currentFrame = index;
+          realBox = { ...(frameBoxes[index] || realBox) };
+          imgEl.src = frameUrl(index, frameInfo?.previewSize || 0);
+          highlightFrame(index);
+          clampBox();
+          updateUI();
+        };
+
+        const roundBox = (b) => ({
+          x: Math.round(b.x),
+          y: Math.round(b.y),
+          w: Math.round(b.w),
+          h: Math.round(b.h),
+        });
+
         runBtn.onclick = async () => {
           runBtn.innerText = "Resuming...";
           runBtn.disabled = true;
           exitBtn.disabled = true;
 
+          frameBoxes[currentFrame] = { ...realBox };
           const payload = {
             node_id: String(nodeId),
             token: String(token),
             action: "submit",
-            crop_data: {
-              x: Math.round(realBox.x),
-              y: Math.round(realBox.y),
-              w: Math.round(realBox.w),
-              h: Math.round(realBox.h),
-            },
+            crop_data: roundBox(frameBoxes[0] || realBox),
           };
+          if (frameCount > 1) {
+            // Frames that were never opened use the last selection.
+            payload.frame_crops = frameBoxes.map((b) => roundBox(b || realBox));
+          }
 
           try {
             const res = await postPayload(payload);